@@ -0,0 +1,32 @@
+"""
+Minimal Django settings for the scrapers and the worker.
+
+Only the models of parser_app are used, so the admin, auth, sessions,
+messages, static files, the middleware and the templates aren't loaded
+and django.setup() is much cheaper. The DB connections are kept open
+between the jobs of the long-running worker.
+
+DJANGO_SETTINGS_MODULE=braincomua_project.settings_scraper
+"""
+
+from .settings import *  # noqa
+
+INSTALLED_APPS = [
+    "django.contrib.postgres",
+    "parser_app",
+]
+
+MIDDLEWARE = []
+
+TEMPLATES = []
+
+AUTH_PASSWORD_VALIDATORS = []
+
+USE_I18N = False
+
+# The main URLconf imports the admin, which isn't installed
+ROOT_URLCONF = "braincomua_project.urls_scraper"
+
+# Persistent connections (one per worker thread), checked before the reuse
+DATABASES["default"]["CONN_MAX_AGE"] = None  # noqa
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True  # noqa
@@ -0,0 +1,6 @@
+"""
+Empty URL configuration of the minimal settings profile (settings_scraper),
+the scrapers don't serve any views.
+"""
+
+urlpatterns = []
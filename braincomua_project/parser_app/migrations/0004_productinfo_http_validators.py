@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0003_productinfo_screen_diagonal_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productinfo",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="productinfo",
+            name="etag",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="productinfo",
+            name="last_modified",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0004_productinfo_http_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productinfo",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="productinfo",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("NW", "New"),
+                    ("IP", "In progress"),
+                    ("DE", "Done"),
+                    ("FD", "Failed"),
+                ],
+                default="NW",
+                max_length=2,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productinfo",
+            index=models.Index(
+                fields=["status", "lease_expires_at"], name="productinfo_queue_idx"
+            ),
+        ),
+    ]
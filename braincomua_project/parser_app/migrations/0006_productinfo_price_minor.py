@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0005_productinfo_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productinfo",
+            name="price_regular_minor",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="productinfo",
+            name="price_sale_minor",
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:51
+
+from django.db import migrations
+
+from parser_app.migrations._backfill import (
+    BackfillMigration,
+    keyset_batches,
+    price_to_minor,
+)
+
+# Rows updated by one bulk_update
+BATCH_SIZE = 2000
+
+
+def backfill_price_minor(apps, schema_editor):
+    """
+    Fill the numeric prices of the existing rows by the keyset batches
+    """
+    ProductInfo = apps.get_model("parser_app", "ProductInfo")
+
+    rows = ProductInfo.objects.only("id", "price_regular", "price_sale")
+    for batch in keyset_batches(rows, BATCH_SIZE):
+        for product in batch:
+            product.price_regular_minor = price_to_minor(product.price_regular)
+            product.price_sale_minor = price_to_minor(product.price_sale)
+
+        ProductInfo.objects.bulk_update(
+            batch, ["price_regular_minor", "price_sale_minor"]
+        )
+
+
+class Migration(BackfillMigration):
+
+    dependencies = [
+        ("parser_app", "0006_productinfo_price_minor"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_price_minor, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:52
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0007_backfill_price_minor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("price_regular_minor", models.BigIntegerField(blank=True, null=True)),
+                ("price_sale_minor", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "recorded_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_history",
+                        to="parser_app.productinfo",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.BrinIndex(
+                        fields=["recorded_at"], name="pricehistory_recorded_brin"
+                    )
+                ],
+            },
+        ),
+    ]
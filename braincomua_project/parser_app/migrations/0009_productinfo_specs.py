@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:52
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0008_pricehistory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productinfo",
+            name="specs",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="productinfo",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["specs"],
+                name="productinfo_specs_gin",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:52
+
+from django.db import migrations
+
+from parser_app.migrations._backfill import (
+    BackfillMigration,
+    flatten_characteristics,
+    keyset_batches,
+)
+
+# Rows updated by one bulk_update
+BATCH_SIZE = 1000
+
+
+def backfill_specs(apps, schema_editor):
+    """
+    Fill the keyed characteristics of the existing rows by the keyset batches
+    """
+    ProductInfo = apps.get_model("parser_app", "ProductInfo")
+
+    rows = ProductInfo.objects.only("id", "characteristics")
+    for batch in keyset_batches(rows, BATCH_SIZE):
+        for product in batch:
+            product.specs = flatten_characteristics(product.characteristics)
+
+        ProductInfo.objects.bulk_update(batch, ["specs"])
+
+
+class Migration(BackfillMigration):
+
+    dependencies = [
+        ("parser_app", "0009_productinfo_specs"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0010_backfill_specs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productinfo",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="productinfo",
+            name="last_error",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="productinfo",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
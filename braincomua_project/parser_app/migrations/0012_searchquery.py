@@ -0,0 +1,69 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0011_productinfo_retries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("NW", "New"),
+                            ("IP", "In progress"),
+                            ("DE", "Done"),
+                            ("FD", "Failed"),
+                        ],
+                        default="NW",
+                        max_length=2,
+                    ),
+                ),
+                ("lease_expires_at", models.DateTimeField(blank=True, null=True)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                ("last_error", models.CharField(blank=True, max_length=255, null=True)),
+                ("query", models.CharField(max_length=255, unique=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="search_queries",
+                        to="parser_app.productinfo",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "lease_expires_at"],
+                        name="searchquery_queue_idx",
+                    )
+                ],
+            },
+        ),
+    ]
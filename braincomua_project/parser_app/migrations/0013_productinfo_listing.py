@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser_app", "0012_searchquery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productinfo",
+            name="available",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="productinfo",
+            name="details_scraped_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:20
+
+from django.db import migrations
+from django.db.models import F
+
+from parser_app.migrations._backfill import BackfillMigration, keyset_batches
+
+# Rows updated by one UPDATE
+BATCH_SIZE = 5000
+
+# Status.DONE
+DONE = "DE"
+
+
+def backfill_details_scraped_at(apps, schema_editor):
+    """
+    The done products with the characteristics were scraped when they were
+    last updated, so the first listing refresh doesn't queue all of them again
+    """
+    ProductInfo = apps.get_model("parser_app", "ProductInfo")
+
+    ids = ProductInfo.objects.filter(
+        status=DONE,
+        characteristics__isnull=False,
+        details_scraped_at__isnull=True,
+    ).values_list("id", flat=True)
+    for batch in keyset_batches(ids, BATCH_SIZE, get_id=lambda product_id: product_id):
+        ProductInfo.objects.filter(id__in=batch).update(
+            details_scraped_at=F("updated_at")
+        )
+
+
+class Migration(BackfillMigration):
+
+    dependencies = [
+        ("parser_app", "0013_productinfo_listing"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_details_scraped_at, migrations.RunPython.noop),
+    ]
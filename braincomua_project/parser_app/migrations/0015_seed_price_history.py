@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:40
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+from parser_app.migrations._backfill import BackfillMigration, keyset_batches
+
+# Rows inserted by one bulk_create
+BATCH_SIZE = 2000
+
+
+def seed_price_history(apps, schema_editor):
+    """
+    Add the current prices of the products without the history as the first rows,
+    so a price, which never changes, is in the history too
+    """
+    ProductInfo = apps.get_model("parser_app", "ProductInfo")
+    PriceHistory = apps.get_model("parser_app", "PriceHistory")
+
+    rows = (
+        ProductInfo.objects.exclude(
+            price_regular_minor__isnull=True, price_sale_minor__isnull=True
+        )
+        .exclude(Exists(PriceHistory.objects.filter(product_id=OuterRef("id"))))
+        .values_list("id", "price_regular_minor", "price_sale_minor", "updated_at")
+    )
+    for batch in keyset_batches(rows, BATCH_SIZE, get_id=lambda row: row[0]):
+        PriceHistory.objects.bulk_create(
+            PriceHistory(
+                product_id=product_id,
+                price_regular_minor=price_regular,
+                price_sale_minor=price_sale,
+                recorded_at=updated_at,
+            )
+            for product_id, price_regular, price_sale, updated_at in batch
+        )
+
+
+class Migration(BackfillMigration):
+
+    dependencies = [
+        ("parser_app", "0014_backfill_details_scraped_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_price_history, migrations.RunPython.noop),
+    ]
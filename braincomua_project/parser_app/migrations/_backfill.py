@@ -0,0 +1,85 @@
+"""
+Shared code of the data migrations (the loader skips the modules starting with "_").
+
+The existing rows are backfilled by the keyset batches (id > the last id
+of the previous batch) in a non-atomic migration: every batch is committed
+separately, so the table isn't locked for the whole backfill and a big table
+doesn't need one long transaction.
+
+The helpers below are frozen copies of parser_app.normalize at the time
+of the migrations, which use them, so the later changes of the module don't
+change the migrations. Don't edit them, a new migration gets its own copy.
+"""
+
+import re
+from typing import Any, Callable, Iterator
+
+from django.db import migrations
+from django.db.models import QuerySet
+
+
+class BackfillMigration(migrations.Migration):
+    """
+    Migration, which commits every batch of its backfill separately
+    """
+
+    atomic = False
+
+
+def keyset_batches(
+    queryset: QuerySet,
+    batch_size: int,
+    get_id: Callable[[Any], int] = lambda row: row.id,
+) -> Iterator[list]:
+    """
+    Rows of the queryset by the batches in the order of id
+    :param queryset: rows to backfill (models, values_list or flat ids)
+    :param batch_size: rows of one batch
+    :param get_id: returns the id of the row
+    :return:
+    """
+    last_id = 0
+    while batch := list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size]):
+        yield batch
+
+        last_id = get_id(batch[-1])
+
+
+# 0007_backfill_price_minor
+PRICE_RE = re.compile(r"(\d[\d\s]*)(?:[.,](\d{1,2}))?")
+
+
+def price_to_minor(value: str | None) -> int | None:
+    """
+    Price text into the minor units (kopecks): "65 799" -> 6579900
+    """
+    if not value:
+        return None
+
+    match = PRICE_RE.search(value)
+    if match is None:
+        return None
+
+    units = int(re.sub(r"\D", "", match.group(1)))
+    minor = int((match.group(2) or "0").ljust(2, "0"))
+
+    return units * 100 + minor
+
+
+# 0010_backfill_specs
+def flatten_characteristics(characteristics: list | None) -> dict | None:
+    """
+    [(title, {name: value}), ...] into the keyed {name: value} (indexed by GIN).
+    The whitespace of the values is collapsed: "e-sim,       Nano" -> "e-sim, Nano".
+    If a name is in several sections, the first value is kept.
+    """
+    if characteristics is None:
+        return None
+
+    specs = {}
+    for _, items in characteristics:
+        for name, value in items.items():
+            if name not in specs:
+                specs[name] = " ".join(value.split()) if value else value
+
+    return specs
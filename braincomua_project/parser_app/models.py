@@ -1,14 +1,145 @@
+import random
+from datetime import timedelta
+from typing import Iterable
+
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 
 
 class Status(models.TextChoices):
     NEW = "NW", "New"
+    IN_PROGRESS = "IP", "In progress"
     DONE = "DE", "Done"
     FAILED = "FD", "Failed"
 
 
-class ProductInfo(models.Model):
+# Default time a claimed product is reserved for one scraper
+LEASE_TIME = timedelta(minutes=10)
+
+# Failed fetches before the product gets the status 'Failed'
+MAX_ATTEMPTS = 5
+
+# Delay before the 1st retry, it is doubled after every failed attempt
+RETRY_BASE_DELAY = timedelta(minutes=5)
+
+# Max delay between two attempts
+RETRY_MAX_DELAY = timedelta(days=1)
+
+
+class QueueQuerySet(models.QuerySet):
+    """
+    DB queue of the items with the statuses, the leases and the retries
+    """
+
+    def claimable(self) -> "QueueQuerySet":
+        """
+        New items and the items with the expired lease,
+        which are due (the retries wait for their next_attempt_at)
+        """
+        now = timezone.now()
+
+        return self.filter(
+            Q(status=Status.NEW)
+            | Q(status=Status.IN_PROGRESS, lease_expires_at__lt=now)
+        ).filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+
+    def claim(
+        self,
+        size: int = 100,
+        lease: timedelta = LEASE_TIME,
+        fields: Iterable[str] | None = None,
+    ) -> list[models.Model]:
+        """
+        Atomically reserve a batch of items for this scraper.
+        The rows locked by the other scrapers are skipped (SELECT ... FOR UPDATE SKIP LOCKED),
+        so any number of processes can drain the queue without duplicate work.
+        Only the given fields are loaded (all of them by default).
+        """
+        with transaction.atomic():
+            ids = list(
+                self.claimable()
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:size]
+            )
+            if not ids:
+                return []
+
+            self.model.objects.filter(id__in=ids).update(
+                status=Status.IN_PROGRESS,
+                lease_expires_at=timezone.now() + lease,
+            )
+
+        claimed = self.model.objects.filter(id__in=ids).order_by("id")
+        if fields:
+            claimed = claimed.only(*fields)
+
+        return list(claimed)
+
+
+class ProductInfoQuerySet(QueueQuerySet):
+    def with_specs(self, specs: dict[str, str]) -> "ProductInfoQuerySet":
+        """
+        Products with all the given characteristics (uses the GIN index), e.g.
+        ProductInfo.objects.with_specs({"Діагональ екрану": '6.7"', "Вбудована пам'ять": "256 ГБ"})
+        """
+        return self.filter(specs__contains=specs)
+
+
+class QueueItem(models.Model):
+    """
+    Item of the DB queue: the status, the lease of the scraper and the retries
+    """
+
+    status = models.CharField(max_length=2, choices=Status.choices, default=Status.NEW)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # Failed attempts in a row and the time of the next retry
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_error = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def mark_done(self) -> None:
+        """
+        Set the status 'Done' and reset the lease and the retries (doesn't save)
+        """
+        self.status = Status.DONE
+        self.lease_expires_at = None
+        self.attempts = 0
+        self.next_attempt_at = None
+        self.last_error = None
+
+    def mark_failed_attempt(self, error: str, permanent: bool = False) -> None:
+        """
+        Schedule the retry with the exponential backoff and the jitter,
+        or set the status 'Failed' after MAX_ATTEMPTS (doesn't save)
+        :param error: error message
+        :param permanent: the error won't go away (e.g. 404), don't retry
+        :return:
+        """
+        self.attempts += 1
+        self.last_error = error[:255]
+        self.lease_expires_at = None
+
+        if permanent or self.attempts >= MAX_ATTEMPTS:
+            self.status = Status.FAILED
+            self.next_attempt_at = None
+            return
+
+        delay = min(RETRY_BASE_DELAY * 2 ** (self.attempts - 1), RETRY_MAX_DELAY)
+        # Jitter (50-100% of the delay), so the failed items don't come back together
+        delay *= random.uniform(0.5, 1)
+
+        self.status = Status.NEW
+        self.next_attempt_at = timezone.now() + delay
+
+
+class ProductInfo(QueueItem):
     link = models.URLField(unique=True)
     name = models.CharField(max_length=255, null=True, blank=True)
     color = models.CharField(max_length=100, null=True, blank=True)
@@ -16,12 +147,84 @@ class ProductInfo(models.Model):
     manufacturer = models.CharField(max_length=100, null=True, blank=True)
     price_regular = models.CharField(max_length=11, null=True, blank=True)
     price_sale = models.CharField(max_length=11, null=True, blank=True)
+    # Normalized prices in the minor units (kopecks), filled at parse time
+    price_regular_minor = models.BigIntegerField(null=True, blank=True, db_index=True)
+    price_sale_minor = models.BigIntegerField(null=True, blank=True, db_index=True)
     sku = models.CharField(max_length=50, null=True, blank=True)
     reviews_count = models.IntegerField(null=True, blank=True)
     images = ArrayField(models.CharField(max_length=255), null=True, blank=True)
     screen_diagonal = models.CharField(max_length=20, null=True, blank=True)
     screen_resolution = models.CharField(max_length=20, null=True, blank=True)
     characteristics = models.JSONField(null=True, blank=True)
-    status = models.CharField(max_length=2, choices=Status.choices, default=Status.NEW)
+    # Characteristics keyed by name {name: value}, queryable by with_specs()
+    specs = models.JSONField(null=True, blank=True)
+    # In stock (from the listing tiles)
+    available = models.BooleanField(null=True, blank=True)
+    # Last scrape of the product page, the listing refresh updates only the prices
+    details_scraped_at = models.DateTimeField(null=True, blank=True)
+    # HTTP validators of the last fetched page (conditional requests on re-scrape)
+    etag = models.CharField(max_length=255, null=True, blank=True)
+    last_modified = models.CharField(max_length=64, null=True, blank=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProductInfoQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "lease_expires_at"], name="productinfo_queue_idx"
+            ),
+            # jsonb_path_ops supports only @> (containment), but is smaller and faster
+            GinIndex(
+                fields=["specs"],
+                opclasses=["jsonb_path_ops"],
+                name="productinfo_specs_gin",
+            ),
+        ]
+
+
+class PriceHistory(models.Model):
+    """
+    Append-only price history, a row is added only when the price of the product changes
+    """
+
+    product = models.ForeignKey(
+        ProductInfo, on_delete=models.CASCADE, related_name="price_history"
+    )
+    price_regular_minor = models.BigIntegerField(null=True, blank=True)
+    price_sale_minor = models.BigIntegerField(null=True, blank=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # The rows are appended in time order, so BRIN is tiny and still selective
+            BrinIndex(fields=["recorded_at"], name="pricehistory_recorded_brin"),
+        ]
+
+
+class SearchQuery(QueueItem):
+    """
+    Search query of the Selenium batch scraper and the product it has found
+    """
+
+    query = models.CharField(max_length=255, unique=True)
+    product = models.ForeignKey(
+        ProductInfo,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="search_queries",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = QueueQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "lease_expires_at"], name="searchquery_queue_idx"
+            ),
+        ]
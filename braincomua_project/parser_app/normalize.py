@@ -0,0 +1,76 @@
+"""
+Normalization of the scraped text values into numbers.
+
+Used by all the scrapers at parse time (the backfill migrations have their own copies).
+"""
+
+import re
+
+# "65 799", "65 799 ₴", "1 299,50 грн" (any spaces, including &nbsp;, as the thousands separator)
+PRICE_RE = re.compile(r"(\d[\d\s]*)(?:[.,](\d{1,2}))?")
+
+INT_RE = re.compile(r"\d[\d\s]*")
+
+
+def price_to_minor(value: str | None) -> int | None:
+    """
+    Price text into the minor units (kopecks): "65 799" -> 6579900
+    """
+    if not value:
+        return None
+
+    match = PRICE_RE.search(value)
+    if match is None:
+        return None
+
+    units = int(re.sub(r"\D", "", match.group(1)))
+    minor = int((match.group(2) or "0").ljust(2, "0"))
+
+    return units * 100 + minor
+
+
+def to_int(value: str | int | None) -> int | None:
+    """
+    The first number of the text: "12 відгуків" -> 12
+    """
+    if value is None or isinstance(value, int):
+        return value
+
+    match = INT_RE.search(value)
+    if match is None:
+        return None
+
+    return int(re.sub(r"\D", "", match.group()))
+
+
+def flatten_characteristics(characteristics: list | None) -> dict | None:
+    """
+    [(title, {name: value}), ...] into the keyed {name: value} (indexed by GIN).
+    The whitespace of the values is collapsed: "e-sim,       Nano" -> "e-sim, Nano".
+    If a name is in several sections, the first value is kept.
+    """
+    if characteristics is None:
+        return None
+
+    specs = {}
+    for _, items in characteristics:
+        for name, value in items.items():
+            if name not in specs:
+                specs[name] = " ".join(value.split()) if value else value
+
+    return specs
+
+
+def normalize_product_info(product_info: dict) -> dict:
+    """
+    Add the numeric prices and the keyed characteristics,
+    convert the reviews count of the parsed product (in place)
+    """
+    product_info["price_regular_minor"] = price_to_minor(
+        product_info.get("price_regular")
+    )
+    product_info["price_sale_minor"] = price_to_minor(product_info.get("price_sale"))
+    product_info["reviews_count"] = to_int(product_info.get("reviews_count"))
+    product_info["specs"] = flatten_characteristics(product_info.get("characteristics"))
+
+    return product_info
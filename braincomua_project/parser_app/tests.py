@@ -1,3 +1,204 @@
-from django.test import TestCase
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from unittest import skipUnless
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from parser_app.normalize import (
+    flatten_characteristics,
+    normalize_product_info,
+    price_to_minor,
+    to_int,
+)
+
+# The scrapers aren't a package, they are imported from their directory
+MODULES_DIR = Path(__file__).resolve().parents[2] / "modules"
+if str(MODULES_DIR) not in sys.path:
+    sys.path.append(str(MODULES_DIR))
+
+from dom_extract import (  # noqa: E402
+    EXTRACT_PRODUCT_JS,
+    PRODUCT_XPATHS,
+    to_product_info,
+)
+from engine_router import missing_fields, url_pattern  # noqa: E402
+from product_parser import PARSERS  # noqa: E402
+
+# Saved product pages
+FIXTURES_DIR = MODULES_DIR.parent / "fixtures" / "products"
+
+HAS_PLAYWRIGHT = importlib.util.find_spec("playwright") is not None
+HAS_SELENIUM = all(
+    importlib.util.find_spec(name) for name in ("selenium", "webdriver_manager")
+)
+
+
+def load_fixtures() -> list[tuple[str, str]]:
+    return [
+        (file.name, file.read_text(encoding="utf-8"))
+        for file in sorted(FIXTURES_DIR.glob("*.html"))
+    ]
+
+
+class ParserParityTests(SimpleTestCase):
+    """
+    All the extraction backends return the same product info for the saved pages
+    """
+
+    def test_fixtures_exist(self):
+        self.assertTrue(load_fixtures())
+
+    def test_lxml_equals_bs4(self):
+        for name, html in load_fixtures():
+            with self.subTest(fixture=name):
+                expected = PARSERS["bs4"](html)
+
+                self.assertTrue(expected["name"])
+                self.assertEqual(PARSERS["lxml"](html), expected)
+
+    def test_lxml_empty_page(self):
+        for html in ("", "  \n"):
+            with self.subTest(html=html):
+                self.assertEqual(PARSERS["lxml"](html), PARSERS["bs4"](html))
+
+    def test_js_contract_shape(self):
+        # page.evaluate / execute_script return the characteristics as pairs
+        result = {
+            "product_info": {
+                "name": "Apple iPhone 16",
+                "characteristics": [["Екран", [["Діагональ екрану", '6.1"']]]],
+            },
+            "errors": [],
+        }
+
+        product_info = to_product_info(result)
+
+        self.assertEqual(
+            product_info["characteristics"], [("Екран", {"Діагональ екрану": '6.1"'})]
+        )
+
+    def test_js_uses_lxml_xpaths(self):
+        # The page evaluates the XPath expressions of the lxml backend
+        self.assertNotIn("__PRODUCT_XPATHS__", EXTRACT_PRODUCT_JS)
+        self.assertIn(
+            json.dumps(PRODUCT_XPATHS, ensure_ascii=False), EXTRACT_PRODUCT_JS
+        )
+
+    @skipUnless(HAS_PLAYWRIGHT, "playwright isn't installed")
+    def test_js_equals_bs4(self):
+        from playwright.sync_api import Error, sync_playwright
+
+        with sync_playwright() as p:
+            try:
+                browser = p.chromium.launch()
+            except Error as e:
+                self.skipTest(f"Chromium isn't installed: {e}")
+
+            try:
+                page = browser.new_page()
+                for name, html in load_fixtures():
+                    with self.subTest(fixture=name):
+                        page.set_content(html)
+                        result = to_product_info(page.evaluate(EXTRACT_PRODUCT_JS))
+
+                        self.assertEqual(result, PARSERS["bs4"](html))
+            finally:
+                browser.close()
+
+    @skipUnless(HAS_SELENIUM, "selenium isn't installed")
+    def test_selenium_js_equals_bs4(self):
+        from selenium.common import WebDriverException
+        from selenium_pool import new_driver
+
+        try:
+            driver = new_driver(block=False)
+        except (WebDriverException, OSError, ValueError) as e:
+            # No Chrome, or webdriver-manager can't download the chromedriver
+            self.skipTest(f"Chrome isn't available: {e}")
+
+        try:
+            for name, html in load_fixtures():
+                with self.subTest(fixture=name):
+                    driver.get("about:blank")
+                    driver.execute_script(
+                        "document.open(); document.write(arguments[0]); document.close();",
+                        html,
+                    )
+                    result = to_product_info(
+                        driver.execute_script(f"return ({EXTRACT_PRODUCT_JS})();")
+                    )
+
+                    self.assertEqual(result, PARSERS["bs4"](html))
+        finally:
+            driver.quit()
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_price_to_minor(self):
+        self.assertEqual(price_to_minor("65 799"), 6579900)
+        self.assertEqual(price_to_minor("65 799 ₴"), 6579900)
+        self.assertEqual(price_to_minor("1 299,50 грн"), 129950)
+        self.assertEqual(price_to_minor("99.5"), 9950)
+
+    def test_price_to_minor_empty(self):
+        self.assertIsNone(price_to_minor(None))
+        self.assertIsNone(price_to_minor(""))
+        self.assertIsNone(price_to_minor("Немає в наявності"))
+
+    def test_to_int(self):
+        self.assertEqual(to_int("12 відгуків"), 12)
+        self.assertEqual(to_int("1 024"), 1024)
+        self.assertEqual(to_int(7), 7)
+        self.assertIsNone(to_int(None))
+        self.assertIsNone(to_int("немає"))
+
+    def test_flatten_characteristics(self):
+        characteristics = [
+            ("Зв'язок", {"SIM": "e-sim,       Nano", "Колір": "Black"}),
+            ("Інше", {"Колір": "White", "Вага": None}),
+        ]
+
+        self.assertEqual(
+            flatten_characteristics(characteristics),
+            {"SIM": "e-sim, Nano", "Колір": "Black", "Вага": None},
+        )
+        self.assertIsNone(flatten_characteristics(None))
+
+    def test_normalize_product_info(self):
+        product_info = normalize_product_info(
+            {
+                "price_regular": "65 799",
+                "price_sale": None,
+                "reviews_count": "3 відгуки",
+                "characteristics": [("Екран", {"Діагональ": '6.1"'})],
+            }
+        )
+
+        self.assertEqual(product_info["price_regular_minor"], 6579900)
+        self.assertIsNone(product_info["price_sale_minor"])
+        self.assertEqual(product_info["reviews_count"], 3)
+        self.assertEqual(product_info["specs"], {"Діагональ": '6.1"'})
+
+
+class EngineRouterTests(SimpleTestCase):
+    def test_url_pattern(self):
+        self.assertEqual(
+            url_pattern(
+                "https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_16-p1145443.html"
+            ),
+            "brain.com.ua/ukr/Mobilniy_telefon",
+        )
+
+    def test_url_pattern_short_slug(self):
+        self.assertEqual(
+            url_pattern("http://127.0.0.1:8080/ukr/Tovar_1-p1.html"),
+            "127.0.0.1:8080/ukr/Tovar_1-p1.html",
+        )
+
+    def test_missing_fields(self):
+        self.assertEqual(missing_fields(None), ["name", "price_regular", "sku"])
+        self.assertEqual(
+            missing_fields({"name": "A", "price_regular": "1", "sku": None}), ["sku"]
+        )
@@ -4,4 +4,6 @@ export DB_NAME=""
 export DB_USER=""
 export DB_PASSWORD=""
 export DB_HOST="localhost"
-export DB_PORT="5432"
\ No newline at end of file
+export DB_PORT="5432"
+# Site (the local fixture server for the load tests: http://127.0.0.1:8080/)
+# export BRAIN_BASE_URL="https://brain.com.ua/"
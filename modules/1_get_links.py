@@ -1,15 +1,158 @@
 """
 This script creates the ProductInfo instances and saves them to the DB with the status 'New'
+
+The category (listing) pages are crawled concurrently by the asyncio engine:
+every round fetches the new listing pages, takes the product links and
+the pagination links of the same category, and the next round fetches
+the pagination pages, which weren't seen yet. The links are deduplicated
+in memory before they get to the DB and inserted by bulk_create in batches.
 """
 
-from load_django import *  # noqa
+import argparse
+import asyncio
+import re
+import threading
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import lxml.html
 
+from load_django import *  # noqa
+import async_engine
+from async_engine import FetchResponse
+from brain_site import BASE_URL, COOKIES, HEADERS, PRODUCT_LINK_RE, link_key
+from db_writer import BulkCreator
 from parser_app.models import ProductInfo, Status
+from rate_limiter import HostRateLimiter
+
+# Category pages to start from
+CATEGORY_URLS = [
+    urljoin(BASE_URL, "ukr/category/Mobilni_telefony-c1274-155/"),
+]
+
+# Max listing pages in flight
+CONCURRENCY = 10
+
+# Max crawl rounds (pagination depth) for one run
+MAX_ROUNDS = 1000
+
+# Pagination of the category: .../page=2/
+PAGE_RE = re.compile(r"page=\d+/?$")
+
+
+def category_root(url: str) -> str:
+    """
+    URL of the category without the page number
+    """
+    return PAGE_RE.sub("", url)
+
+
+class LinkCrawler:
+    """
+    Collects the product links and the listing pages found on the fetched pages
+    """
+
+    def __init__(self, creator: BulkCreator) -> None:
+        self.creator = creator
+
+        self.seen_products: set[bytes] = set()
+        self.seen_pages: set[bytes] = set()
+        self.next_pages: list[str] = []
+        self.products_count = 0
+        self._lock = threading.Lock()
+
+    def handle_listing_page(self, url: str, response: FetchResponse) -> None:
+        """
+        Take the product links and the pagination links of the listing page
+        """
+        tree = lxml.html.document_fromstring(response.text)
+        root = category_root(url)
+        host = urlsplit(url).netloc
+
+        new_products = []
+        new_pages = []
+        with self._lock:
+            for href in tree.xpath("//a/@href"):
+                link = urldefrag(urljoin(url, href)).url
+
+                if urlsplit(link).netloc != host:
+                    continue
+
+                if PRODUCT_LINK_RE.search(link):
+                    key = link_key(link)
+                    if key not in self.seen_products:
+                        self.seen_products.add(key)
+                        new_products.append(link)
+                elif PAGE_RE.search(link) and category_root(link) == root:
+                    key = link_key(link)
+                    if key not in self.seen_pages:
+                        self.seen_pages.add(key)
+                        new_pages.append(link)
+
+            self.next_pages.extend(new_pages)
+            self.products_count += len(new_products)
+
+        for link in new_products:
+            self.creator.add(ProductInfo(link=link, status=Status.NEW))
+
+    def crawl(self, category_urls: list[str], concurrency: int = CONCURRENCY) -> None:
+        """
+        Crawl the categories round by round, until there are no new listing pages
+        """
+        limiter = HostRateLimiter()
+
+        pages = []
+        for url in category_urls:
+            self.seen_pages.add(link_key(url))
+            pages.append(url)
+
+        for round_number in range(1, MAX_ROUNDS + 1):
+            if not pages:
+                break
+
+            print(f"🔎 Round {round_number}: {len(pages)} listing pages")
+
+            asyncio.run(
+                async_engine.run(
+                    pages,
+                    get_url=lambda page: page,
+                    handler=self.handle_listing_page,
+                    concurrency=concurrency,
+                    headers=HEADERS,
+                    cookies=COOKIES,
+                    limiter=limiter,
+                )
+            )
+
+            pages, self.next_pages = self.next_pages, []
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Create ProductInfo instances")
+    parser.add_argument(
+        "categories",
+        nargs="*",
+        default=CATEGORY_URLS,
+        help="Category pages to start from",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CONCURRENCY,
+        help="Max listing pages in flight",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    with BulkCreator(ProductInfo) as creator:
+        crawler = LinkCrawler(creator)
+        crawler.crawl(args.categories, args.concurrency)
+
+    print(f"✅ Found {crawler.products_count} product links")
 
-# In a real situation, there will be an infinite while True loop here, as long as the page request returns a 200 status code
-data = {
-    "link": "https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_16_Pro_Max_256GB_Black_Titanium-p1145443.html",
-    "status": Status.NEW,
-}
 
-ProductInfo.objects.get_or_create(**data)
+if __name__ == "__main__":
+    main()
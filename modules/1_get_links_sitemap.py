@@ -0,0 +1,184 @@
+"""
+This script seeds the ProductInfo instances (status 'New') from the sitemap
+
+The sitemap index and the child sitemaps (plain or gzipped) are read by
+the incremental parser (iterparse), so a document is never held in memory
+as a whole. Only the product links (...-p<id>.html) are taken; they are
+deduplicated in memory and inserted by bulk_create in big batches.
+
+The source is a sitemap URL, a local sitemap file or a directory with the sitemap files:
+    python 1_get_links_sitemap.py https://brain.com.ua/sitemap.xml
+    python 1_get_links_sitemap.py ./sitemaps/
+"""
+
+import argparse
+import gzip
+import io
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urljoin, urlsplit
+
+from lxml import etree
+from requests import Session
+from requests.exceptions import RequestException
+
+from load_django import *  # noqa
+from brain_site import BASE_URL, COOKIES, HEADERS, PRODUCT_LINK_RE, link_key
+from db_writer import BulkCreator
+from parser_app.models import ProductInfo, Status
+
+SITEMAP_URL = urljoin(BASE_URL, "sitemap.xml")
+
+# Links inserted by one bulk_create
+BATCH_SIZE = 5000
+
+# First bytes of the gzip file
+GZIP_MAGIC = b"\x1f\x8b"
+
+session = Session()
+session.headers.update(HEADERS)
+session.cookies.update(COOKIES)
+
+
+def is_url(source: str) -> bool:
+    return urlsplit(source).scheme in ("http", "https")
+
+
+def open_stream(source: str) -> io.BufferedReader:
+    """
+    Binary stream of the sitemap URL or file
+    """
+    if is_url(source):
+        response = session.get(source, stream=True, timeout=60)
+        response.raise_for_status()
+        # Content-Encoding is decoded by urllib3, a .gz file is decompressed later
+        response.raw.decode_content = True
+
+        return io.BufferedReader(response.raw)
+
+    return open(source, "rb")
+
+
+def iter_sitemap(source: str) -> Iterator[tuple[str, str]]:
+    """
+    Yield (kind, loc) of the sitemap, kind is "sitemap" (index entry) or "url"
+    """
+    with open_stream(source) as raw:
+        # The gzip is decompressed on the fly
+        stream = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == GZIP_MAGIC else raw
+
+        for _, element in etree.iterparse(
+            stream, events=("end",), tag=("{*}sitemap", "{*}url")
+        ):
+            loc = element.findtext("{*}loc")
+            kind = etree.QName(element).localname
+
+            # Free the parsed elements, the memory doesn't grow with the document
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+            if loc:
+                yield kind, loc.strip()
+
+
+def resolve_child(parent: str, loc: str) -> str | None:
+    """
+    Location of the child sitemap: the URL for the remote index,
+    the file with the same name next to the local index
+    """
+    if is_url(parent):
+        return loc
+
+    path = Path(parent).parent / Path(urlsplit(loc).path).name
+    if path.exists():
+        return str(path)
+
+    print(f"❌ Error child sitemap {loc} isn't found next to {parent}")
+    # TO DO: logging
+    return None
+
+
+def iter_product_links(source: str, follow_index: bool = True) -> Iterator[str]:
+    """
+    Yield the product links of the sitemap and its child sitemaps
+    """
+    sources = [source]
+    while sources:
+        current = sources.pop()
+        print(f"🗺️ Reading {current}")
+
+        try:
+            for kind, loc in iter_sitemap(current):
+                if kind == "sitemap":
+                    if follow_index and (child := resolve_child(current, loc)):
+                        sources.append(child)
+                elif PRODUCT_LINK_RE.search(loc):
+                    yield loc
+        except (RequestException, OSError, etree.XMLSyntaxError) as e:
+            print(f"❌ Error reading {current}: {e}")
+            # TO DO: logging
+
+
+def iter_sources(source: str) -> Iterator[tuple[str, bool]]:
+    """
+    Yield (sitemap, follow index) for the URL, the file or every file of the directory
+    """
+    if not is_url(source) and Path(source).is_dir():
+        # All the files are read, so the index entries aren't followed
+        for path in sorted(Path(source).rglob("*")):
+            if path.name.endswith((".xml", ".xml.gz")):
+                yield str(path), False
+    else:
+        yield source, True
+
+
+def seed(source: str, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Insert the new product links of the sitemap, returns the number of the unique links
+    """
+    seen = set()
+
+    with BulkCreator(ProductInfo, batch_size=batch_size) as creator:
+        for sitemap, follow_index in iter_sources(source):
+            for link in iter_product_links(sitemap, follow_index):
+                key = link_key(link)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                creator.add(ProductInfo(link=link, status=Status.NEW))
+
+    return len(seen)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Create ProductInfo instances from the sitemap"
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default=SITEMAP_URL,
+        help="Sitemap URL, local sitemap file or directory",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Links inserted by one bulk_create",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    count = seed(args.source, args.batch_size)
+
+    print(f"✅ Found {count} product links")
+
+
+if __name__ == "__main__":
+    main()
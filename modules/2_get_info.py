@@ -15,230 +15,191 @@ Characteristics
 ***************
 """
 
-import random
-import time
-from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pprint import pprint  # noqa
+from typing import Callable, Iterable
 
-from bs4 import BeautifulSoup
+from aiohttp import ClientResponseError
 from requests import Session
-from requests.exceptions import RequestException
+from requests.exceptions import HTTPError, RequestException
 
 from load_django import *  # noqa
-from parser_app.models import ProductInfo, Status
+import async_engine
+import http_cache
+import pipeline
+from async_engine import FetchResponse
+from brain_site import COOKIES, HEADERS
+from page_archive import PageArchive
+from parser_app.models import ProductInfo
+from product_parser import PARSERS
+from product_store import CLAIM_SIZE, QUEUE_FIELDS, ProductStore, claim_products
+from rate_limiter import HostRateLimiter
 
 # Max threads
 THREADS = 5
 
+# Max tasks submitted to the ThreadPoolExecutor and not done yet
+MAX_IN_FLIGHT = THREADS * 2
+
+# Max pages in flight for the asyncio engine
+CONCURRENCY = async_engine.CONCURRENCY
+
+# Extraction backend ("lxml" or "bs4"), see product_parser.PARSERS
+PARSER = "lxml"
+parse_html = PARSERS[PARSER]
+
+# Parsed products, retries and price changes are saved in batches
+store = ProductStore()
+
+# Store the fetched pages, so the extraction can be re-run without the network
+ARCHIVE = True
+archive = PageArchive()
+
+# Shared by all workers, the requests to one host are throttled together
+limiter = HostRateLimiter()
+
 # 1. Initialize the Session
 session = Session()
 
 # 2. Assign global headers (these will be sent with every request)
-session.headers.update(
-    {
-        "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "accept-language": "en-GB,en;q=0.9,ru-RU;q=0.8,ru;q=0.7,en-US;q=0.6",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36",
-        "sec-ch-ua-platform": '"Windows"',
-        "dnt": "1",
-    }
-)
+session.headers.update(HEADERS)
 
 # 3. Pre-load your specific cookies into the session
 # This mimics a returning user with an active session
-initial_cookies = {
-    "PHPSESSID": "s0449bcr0ud0eeu1gsemb3ckgh",
-    "Lang": "ua",
-    "CityID": "23562",
-    "view_type": "grid",
-}
-session.cookies.update(initial_cookies)
+session.cookies.update(COOKIES)
 
 
-def get_product_data(parsed_data: ProductInfo) -> dict | None:
+def save_failed_attempt(parsed_data: ProductInfo, error: Exception) -> None:
     """
-    Parse product data from https://brain.com.ua
+    Schedule the retry of the product (or set the status 'Failed')
     :param parsed_data:
+    :param error: error of requests or aiohttp
     :return:
     """
+    if isinstance(error, HTTPError):
+        status = error.response.status_code
+    elif isinstance(error, ClientResponseError):
+        status = error.status
+    else:
+        status = None
+
+    store.save_failed_attempt(parsed_data, str(error), status)
+
+
+def fetch_product_page(parsed_data: ProductInfo) -> FetchResponse | None:
+    """
+    Fetch the product page by the shared Session
+    :param parsed_data:
+    :return: None on any network or HTTP error
+    """
+    # Wait for the free slot of the host
+    limiter.wait(parsed_data.link)
+
     try:
         # We don't need to pass headers/cookies here; they are held by the session
-        response = session.get(parsed_data.link)
+        # Only the validators of the last scrape are sent
+        response = session.get(
+            parsed_data.link, headers=http_cache.conditional_headers(parsed_data)
+        )
+        limiter.feedback(
+            parsed_data.link,
+            response.status_code,
+            response.headers.get("Retry-After"),
+        )
         response.raise_for_status()  # Raises an error for 4xx or 5xx codes
     except RequestException as e:
         print(f"❌ Error fetching {parsed_data.link}: {e}")
+        save_failed_attempt(parsed_data, e)
 
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    return FetchResponse(
+        url=parsed_data.link,
+        status=response.status_code,
+        headers=response.headers,
+        content=response.content,
+        encoding=response.encoding or response.apparent_encoding,
+    )
 
-    # Product Data
-    product_info = {}
 
-    # Name
-    try:
-        product_info["name"] = soup.select_one(
-            "h1.main-title"
-        ).text.strip()  # //h1[@class='main-title']
-    except AttributeError as e:
-        print("❌ Error Name", e)
-        product_info["name"] = None
-        # TO DO: logging
+def accept_product_page(
+    parsed_data: ProductInfo, response: FetchResponse
+) -> str | None:
+    """
+    Check the fetched page before parsing: archive it and remember the validators
+    :param parsed_data:
+    :param response:
+    :return: HTML to parse, None if the page wasn't changed since the last scrape
+    """
+    if http_cache.is_unchanged(parsed_data, response.status, response.content):
+        # Nothing to parse, the stored data is up to date
+        store.mark_unchanged(parsed_data)
 
-    # Color
-    try:
-        product_info["color"] = soup.select_one(
-            "a[title^='Колір']"
-        ).text.strip()  # //a[starts-with(@title, 'Колір')]
-    except AttributeError as e:
-        print("❌ Error Color", e)
-        product_info["color"] = None
-        # TO DO: logging
+        return None
 
-    # Built-in Memory
-    try:
-        product_info["builtin_memory"] = soup.select_one(
-            "a[title^='Вбудована пам']"
-        ).text.strip()  # //a[starts-with(@title, 'Вбудована пам')]
-    except AttributeError as e:
-        print("❌ Error Built-in Memory", e)
-        product_info["builtin_memory"] = None
-        # TO DO: logging
+    if ARCHIVE:
+        archive.append(parsed_data.link, response.content, response.encoding)
 
-    # Manufacturer
-    try:
-        product_info["manufacturer"] = (
-            soup.find(string="Виробник").find_next("span").text.strip()
-        )
-        # //span[text()='Виробник']/following-sibling::span
-    except AttributeError as e:
-        print("❌ Error Manufacturer", e)
-        product_info["manufacturer"] = None
-        # TO DO: logging
+    # Saved together with the parsed data
+    http_cache.remember_validators(parsed_data, response.headers, response.content)
 
-    # Prices
-    try:
-        prices = soup.select(
-            ".main-price-block .price-wrapper > span"
-        )  # //*[contains(@class, 'main-price-block')]//*[@class='price-wrapper']/span
-    except AttributeError as e:
-        print("❌ Error Prices", e)
-        product_info["price_regular"] = None
-        product_info["price_sale"] = None
-        # TO DO: logging
-    else:
-        # Regular Price
-        try:
-            product_info["price_regular"] = prices[0].text.strip()
-        except IndexError:
-            product_info["price_regular"] = None
-            # TO DO: logging
+    return response.text
 
-        # Sale Price
-        try:
-            product_info["price_sale"] = prices[1].text.strip()
-        except IndexError:
-            product_info["price_sale"] = None
-            # TO DO: logging
 
-    # SKU
-    try:
-        sku = soup.select_one(".br-pr-code-val")
+def fetch_product_html(parsed_data: ProductInfo) -> str | None:
+    """
+    Fetch stage of the pipeline
+    :param parsed_data:
+    :return: HTML to parse, None if there is nothing to parse
+    """
+    response = fetch_product_page(parsed_data)
+    if response is None:
+        return None
 
-        product_info["sku"] = sku.text.strip()
-        # //*[@class='br-pr-code-val']
-    except AttributeError as e:
-        print("❌ Error SKU", e)
-        product_info["sku"] = None
-        # TO DO: logging
+    return accept_product_page(parsed_data, response)
 
-    # Reviews Count
-    try:
-        product_info["reviews_count"] = soup.select_one(
-            ".reviews-count span"
-        ).text.strip()
-        # //*[contains(@class, 'reviews-count')]/span
-    except AttributeError as e:
-        print("❌ Error Review Count", e)
-        product_info["reviews_count"] = None
-        # TO DO: logging
 
-    # Images
-    try:
-        images = soup.select(".br-pr-slider .br-main-img")
-        # //*[contains(@class, 'br-pr-slider')]//img[@class='br-main-img']
+def handle_product_page(
+    parsed_data: ProductInfo, response: FetchResponse
+) -> dict | None:
+    """
+    Parse the fetched product page and save the result
+    :param parsed_data:
+    :param response:
+    :return: None if the page wasn't changed since the last scrape
+    """
+    html = accept_product_page(parsed_data, response)
+    if html is None:
+        return None
 
-        images_srcs = []
-        for image in images:
-            images_srcs.append(image.get("src"))
+    product_info = parse_html(html)
 
-        product_info["images"] = images_srcs
-    except AttributeError as e:
-        print("❌ Error Images", e)
-        product_info["images"] = None
-        # TO DO: logging
+    # Saving product_info into DB
+    store.save(parsed_data, product_info)
 
-    # Characteristics
-    try:
-        characteristics = soup.select(".br-pr-chr-item")
-        # //*[@class='br-pr-chr-item']
-
-        characteristics_list = []
-        for characteristic in characteristics:
-            try:
-                title = characteristic.select_one("h3").text.strip()
-
-                items = characteristic.select("div > div")
-            except AttributeError:
-                # TO DO: logging
-                continue
-            else:
-                items_dict = {}
-                for item in items:
-                    try:
-                        key, value, *rest = item.select("span")
-                    except AttributeError:
-                        # TO DO: logging
-                        continue
-                    else:
-                        # Default parameter
-                        param_name = None
-                        param_value = None
-
-                        try:
-                            param_name = key.text.strip()
-                            param_value = value.text.replace("\xa0", " ").strip()
-                        except AttributeError:
-                            # TO DO: logging
-                            continue
-                        else:
-                            items_dict[param_name] = param_value
-                        finally:
-                            # Screen Diagonal
-                            if param_name == "Діагональ екрану":
-                                product_info["screen_diagonal"] = param_value
-
-                            # Screen Resolution
-                            if param_name == "Роздільна здатність екрану":
-                                product_info["screen_resolution"] = param_value
-
-                # Append characteristic list
-                characteristics_list.append((title, items_dict))
-
-        product_info["characteristics"] = characteristics_list
-    except AttributeError:
-        product_info["characteristics"] = None
-        # TO DO: logging
+    return product_info
 
-    # Saving product_info into DB
-    for key, value in product_info.items():
-        setattr(parsed_data, key, value)
 
-    parsed_data.status = Status.DONE
-    parsed_data.save()
+def get_product_data(parsed_data: ProductInfo) -> dict | None:
+    """
+    Parse product data from https://brain.com.ua
+    :param parsed_data:
+    :return: None on any error (the retry is scheduled)
+    """
+    try:
+        response = fetch_product_page(parsed_data)
+        if response is None:
+            return None
+
+        product_info = handle_product_page(parsed_data, response)
+    except Exception as e:
+        print(f"❌ Error parsing {parsed_data.link}: {e}")
+        # TO DO: logging
+        save_failed_attempt(parsed_data, e)
 
-    # Timeout
-    time.sleep(random.uniform(1, 3))
+        return None
 
     # pprint(product_info)
 
@@ -256,12 +217,231 @@ def get_product_data(parsed_data: ProductInfo) -> dict | None:
 #     pprint.pprint(data)
 
 
+def report_errors(futures: Iterable[Future]) -> None:
+    """
+    Print the exceptions of the done futures (they aren't raised by wait())
+    """
+    for future in futures:
+        if error := future.exception():
+            print(f"❌ Error in the worker: {error!r}")
+            # TO DO: logging
+
+
+def map_bounded(
+    executor: ThreadPoolExecutor,
+    fn: Callable,
+    items: Iterable,
+    max_in_flight: int = MAX_IN_FLIGHT,
+) -> None:
+    """
+    Executor.map, which takes the next item only when there is a free slot
+    (Executor.map submits all the items at once)
+    """
+    in_flight = set()
+
+    for item in items:
+        if len(in_flight) >= max_in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            report_errors(done)
+
+        in_flight.add(executor.submit(fn, item))
+
+    done, _ = wait(in_flight)
+    report_errors(done)
+
+
+def reparse_archived_batch(pages: list[tuple[str, str]]) -> None:
+    """
+    Parse the archived pages and save the parsed data
+    :param pages: (link, html) pairs
+    :return:
+    """
+    products = ProductInfo.objects.only(*QUEUE_FIELDS).in_bulk(
+        [link for link, _ in pages], field_name="link"
+    )
+
+    for link, html in pages:
+        parsed_data = products.get(link)
+        if parsed_data is None:
+            print(f"❌ Error {link} isn't in DB")
+            # TO DO: logging
+            continue
+
+        store.save_parsed(parsed_data, parse_html(html))
+
+
+def reparse_archive() -> None:
+    """
+    Re-run the extraction on the last archived page of every link (no network)
+    """
+    pages = []
+    for record, html in archive.iter_pages():
+        pages.append((record["link"], html))
+
+        if len(pages) >= store.parsed_writer.batch_size:
+            reparse_archived_batch(pages)
+            pages = []
+
+    if pages:
+        reparse_archived_batch(pages)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse product data by Requests / BS4")
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "async", "pipeline"],
+        default="threads",
+        help="'threads' - ThreadPoolExecutor with the shared Session, "
+        "'async' - asyncio engine with its own connection pool, "
+        "'pipeline' - fetcher threads, parse processes and one DB writer",
+    )
+    parser.add_argument(
+        "--from-archive",
+        action="store_true",
+        help="Re-parse the archived pages instead of fetching NEW products",
+    )
+    parser.add_argument(
+        "--archive",
+        action=argparse.BooleanOptionalAction,
+        default=ARCHIVE,
+        help="Store the fetched pages in the archive",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=archive.path,
+        help="Location of the page archive",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=list(PARSERS),
+        default=PARSER,
+        help="Extraction backend",
+    )
+    parser.add_argument(
+        "--claim-size",
+        type=int,
+        default=CLAIM_SIZE,
+        help="Products reserved by one claim",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CONCURRENCY,
+        help="Max pages in flight for the asyncio engine",
+    )
+    parser.add_argument(
+        "--fetchers",
+        type=int,
+        default=pipeline.FETCHERS,
+        help="Fetcher threads of the pipeline",
+    )
+    parser.add_argument(
+        "--parsers",
+        type=int,
+        default=pipeline.PARSERS,
+        help="Parse processes of the pipeline",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=pipeline.QUEUE_SIZE,
+        help="Max pages waiting between two stages of the pipeline",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=limiter.rate,
+        help="Max requests per second to one host (0 - no limit)",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=limiter.burst,
+        help="Max requests to one host without waiting",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=limiter.jitter,
+        help="Max random seconds added to every delay",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=store.writer.batch_size,
+        help="Max products saved by one bulk_update",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=store.writer.flush_interval,
+        help="Max seconds a parsed product waits before it is saved",
+    )
+
+    return parser.parse_args()
+
+
 def main():
-    # Get New ProductInfo
-    parsed_links = ProductInfo.objects.filter(status=Status.NEW)
+    global parse_html, ARCHIVE, archive
+
+    args = parse_args()
+
+    parse_html = PARSERS[args.parser]
+
+    ARCHIVE = args.archive
+    archive = PageArchive(args.archive_dir)
 
-    with ThreadPoolExecutor(max_workers=THREADS) as executor:
-        executor.map(get_product_data, parsed_links)
+    limiter.rate = args.rate
+    limiter.burst = args.burst
+    limiter.jitter = args.jitter
+
+    for writer in (store.writer, store.parsed_writer):
+        writer.batch_size = args.batch_size
+        writer.flush_interval = args.flush_interval
+
+    # Claim New ProductInfo (and the ones with the expired lease)
+    parsed_links = claim_products(args.claim_size)
+
+    # The archived pages have the old prices, they aren't the history of today
+    if not args.from_archive:
+        store.track_prices()
+
+    try:
+        if args.from_archive:
+            reparse_archive()
+        elif args.engine == "async":
+            asyncio.run(
+                async_engine.run(
+                    parsed_links,
+                    get_url=lambda product: product.link,
+                    handler=handle_product_page,
+                    concurrency=args.concurrency,
+                    get_headers=http_cache.conditional_headers,
+                    on_error=save_failed_attempt,
+                    headers=HEADERS,
+                    cookies=COOKIES,
+                    limiter=limiter,
+                )
+            )
+        elif args.engine == "pipeline":
+            pipeline.run(
+                parsed_links,
+                fetch=fetch_product_html,
+                parse=parse_html,
+                save=store.save,
+                fetchers=args.fetchers,
+                parsers=args.parsers,
+                queue_size=args.queue_size,
+                on_error=save_failed_attempt,
+            )
+        else:
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                map_bounded(executor, get_product_data, parsed_links)
+    finally:
+        # Save the rest of the buffers
+        store.close()
+        archive.close()
 
 
 if __name__ == "__main__":
@@ -3,10 +3,25 @@ This script makes some actions:
 load page, enter search text,
 click search button and first product of the list,
 parse product data and save to DB
+
+The product data is extracted by one execute_script call (EXTRACT = "js"),
+the fields are the same as the ones of the Requests scraper.
+EXTRACT = "webdriver" uses find_element / get_attribute for every field.
+
+With --batch the search queries are taken from a file (one per line)
+or from the DB (SearchQuery with the status 'New') and run by a pool
+of the long-lived headless drivers:
+    python 3_get_info_selenium.py --batch --queries queries.txt --drivers 8
+
+With --listing the tiles of the search results / category pages are saved
+(prices and availability), the product pages are queued only when needed.
 """
 
+import argparse
 import time
+from functools import partial
 from pprint import pprint  # noqa
+from typing import Iterator
 
 from selenium import webdriver
 from selenium.common import NoSuchElementException
@@ -15,10 +30,32 @@ from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+from django.utils import timezone
 
 from load_django import *  # noqa
-from parser_app.models import ProductInfo, Status
+import selenium_pool
+from brain_site import BASE_URL, PRODUCT_LINK_RE
+from dom_extract import EXTRACT_LISTING_JS, EXTRACT_PRODUCT_JS, to_product_info
+from listing_store import MAX_PAGES, ListingStore
+from parser_app.models import ProductInfo, SearchQuery, Status
+from parser_app.normalize import normalize_product_info
+from price_tracker import PriceTracker
+from resource_blocking import INTERACTIVE_RESOURCE_TYPES, ResourceBlocker
+
+# Block the images, fonts, analytics and ads (and the styles in the listing mode)
+BLOCK_RESOURCES = True
+
+# Extraction of the product data: "js" (one execute_script) or "webdriver"
+EXTRACT = "js"
+
+# Search query of the single run
+SEARCH_QUERY = "Apple iPhone 15 128GB Black"
+
+# Search queries reserved by one claim (batch mode)
+CLAIM_SIZE = 20
+
+# Seconds to wait for an element
+WAIT_TIMEOUT = 10
 
 
 def open_page(driver, url: str) -> None:
@@ -29,7 +66,7 @@ def open_page(driver, url: str) -> None:
     driver.maximize_window()
 
 
-def enter_search_query(wait) -> None:
+def enter_search_query(wait, query: str = SEARCH_QUERY) -> None:
     """
     Enter search query.
     """
@@ -43,7 +80,7 @@ def enter_search_query(wait) -> None:
         )
     )
     search_input.clear()
-    search_input.send_keys("Apple iPhone 15 128GB Black")
+    search_input.send_keys(query)
 
 
 def click_search_button(wait) -> None:
@@ -71,6 +108,9 @@ def click_first_product(wait) -> None:
     )
     first_product.click()
 
+    # The product page is loaded
+    wait.until(EC.url_matches(PRODUCT_LINK_RE.pattern))
+
 
 def parse_product_data(driver, wait) -> dict | None:
     # Product Data
@@ -218,20 +258,41 @@ def parse_product_data(driver, wait) -> dict | None:
     return product_info
 
 
-def save_to_db(driver, data: dict) -> None:
+def extract_product_data(driver) -> dict:
+    """
+    Extract product data by one execute_script call (one request to chromedriver)
+    """
+    return to_product_info(driver.execute_script(f"return ({EXTRACT_PRODUCT_JS})();"))
+
+
+def save_to_db(driver, data: dict, tracker: PriceTracker) -> ProductInfo:
     # Saving product_info into DB
+    normalize_product_info(data)
     data["link"] = driver.current_url
     data["status"] = Status.DONE
+    data["details_scraped_at"] = timezone.now()
+
+    # The product can be known already (e.g. added by the listing refresh)
+    product, _ = ProductInfo.objects.update_or_create(link=data["link"], defaults=data)
 
-    ProductInfo.objects.get_or_create(**data)
+    # Price history (only if the price has changed), one tracker for the whole run
+    tracker.record(product.id, product.price_regular_minor, product.price_sale_minor)
 
+    return product
 
-def steps(url: str, driver: WebDriver, wait: WebDriverWait) -> None:
+
+def steps(
+    url: str,
+    driver: WebDriver,
+    wait: WebDriverWait,
+    tracker: PriceTracker,
+    query: str = SEARCH_QUERY,
+) -> ProductInfo:
     # Step 1: Open the page
     open_page(driver, url)
 
     # Step 2: Enter search query
-    enter_search_query(wait)
+    enter_search_query(wait, query)
 
     # Step 3: Click the "Find" button
     click_search_button(wait)
@@ -240,29 +301,196 @@ def steps(url: str, driver: WebDriver, wait: WebDriverWait) -> None:
     click_first_product(wait)
 
     # Step 5: Parse product details
-    data = parse_product_data(driver, wait)
+    if EXTRACT == "js":
+        data = extract_product_data(driver)
+    else:
+        data = parse_product_data(driver, wait)
 
     # Step 6: Save to DB
-    save_to_db(driver, data)
+    product = save_to_db(driver, data, tracker)
 
     # pprint(data)
 
+    return product
+
+
+def scrape_listing(
+    driver: WebDriver, url: str, store: ListingStore, max_pages: int = MAX_PAGES
+) -> None:
+    """
+    Save the tiles of the listing and its next pages (one execute_script per page)
+    """
+    seen = set()
+
+    while url and url not in seen and len(seen) < max_pages:
+        seen.add(url)
+        print(f"📄 Listing page {len(seen)}: {url}")
+
+        driver.get(url)
+        result = driver.execute_script(f"return ({EXTRACT_LISTING_JS})();")
+        store.save_tiles(result["tiles"])
+
+        url = result["next_page"]
+
+
+def main_listing(args: argparse.Namespace) -> None:
+    """
+    Refresh the prices from the listing pages by one headless driver
+    """
+    store = ListingStore()
+    driver = selenium_pool.new_driver(headless=args.headless, block=BLOCK_RESOURCES)
+
+    try:
+        for url in args.listing:
+            scrape_listing(driver, url, store, args.max_pages)
+    finally:
+        # Save the rest of the buffers
+        store.close()
+        driver.quit()
+
+    print(store.report())
+
+
+def read_queries(path: str) -> list[str]:
+    """
+    Search queries of the file, one per line (the empty lines and # comments are skipped)
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def claim_queries(size: int = CLAIM_SIZE) -> Iterator[SearchQuery]:
+    """
+    Claim the batches of the search queries until the DB queue is empty
+    """
+    while batch := SearchQuery.objects.claim(size):
+        yield from batch
+
+
+def search_job(
+    driver: WebDriver, item: str | SearchQuery, tracker: PriceTracker
+) -> None:
+    """
+    Find the product of the search query on the driver of the pool
+    """
+    query = item.query if isinstance(item, SearchQuery) else item
+    wait = WebDriverWait(driver, WAIT_TIMEOUT)
+    product = steps(BASE_URL, driver, wait, tracker, query)
+
+    if isinstance(item, SearchQuery):
+        item.product = product
+        item.mark_done()
+        item.save()
+
+
+def search_failed(item: str | SearchQuery, error: Exception) -> None:
+    """
+    Schedule the retry of the DB search query (or set the status 'Failed')
+    """
+    if isinstance(item, SearchQuery):
+        item.mark_failed_attempt(str(error))
+        item.save()
+
+
+def main_batch(args: argparse.Namespace) -> None:
+    """
+    Run the search queries by the pool of the headless drivers
+    """
+    queries = (
+        read_queries(args.queries) if args.queries else claim_queries(args.claim_size)
+    )
+
+    # One price tracker (and its writer thread) for all the jobs
+    with PriceTracker(preload=False) as tracker:
+        selenium_pool.run(
+            queries,
+            partial(search_job, tracker=tracker),
+            drivers=args.drivers,
+            max_jobs_per_driver=args.max_jobs,
+            on_error=search_failed,
+            headless=args.headless,
+            block=BLOCK_RESOURCES,
+            # The search is click-driven, the styles are kept
+            resource_types=INTERACTIVE_RESOURCE_TYPES,
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse product data by Selenium")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Run the search queries by the pool of the headless drivers",
+    )
+    parser.add_argument(
+        "--listing",
+        nargs="+",
+        metavar="URL",
+        help="Save the tiles of the search results / category pages",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=MAX_PAGES,
+        help="Max pages of one listing",
+    )
+    parser.add_argument(
+        "--queries",
+        help="File with the search queries (one per line), the DB queue by default",
+    )
+    parser.add_argument(
+        "--drivers",
+        type=int,
+        default=selenium_pool.DRIVERS,
+        help="Drivers of the pool",
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=selenium_pool.MAX_JOBS_PER_DRIVER,
+        help="Jobs of one driver before it's restarted",
+    )
+    parser.add_argument(
+        "--headless",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run the browsers of the pool / listing mode without the window",
+    )
+    parser.add_argument(
+        "--claim-size",
+        type=int,
+        default=CLAIM_SIZE,
+        help="DB search queries reserved by one claim",
+    )
+
+    return parser.parse_args()
+
 
 def main() -> None:
     # Initialize the driver
     chrome_options = webdriver.ChromeOptions()
     chrome_options.add_argument("--start-maximized")
+    # The network events are read from the performance log to count the requests
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     driver = webdriver.Chrome(
-        options=chrome_options, service=Service(ChromeDriverManager().install())
+        options=chrome_options, service=Service(selenium_pool.driver_path())
     )
     driver.set_window_size(1920, 1080)
-    wait = WebDriverWait(driver, 10)
+    wait = WebDriverWait(driver, WAIT_TIMEOUT)
+
+    blocker = ResourceBlocker(INTERACTIVE_RESOURCE_TYPES) if BLOCK_RESOURCES else None
+    if blocker:
+        blocker.attach_selenium(driver)
 
     try:
         # Run actions
-        url = "https://brain.com.ua/"
-        steps(url, driver, wait)
+        with PriceTracker(preload=False) as tracker:
+            steps(BASE_URL, driver, wait, tracker)
     finally:
+        if blocker:
+            blocker.collect_selenium(driver)
+            print(blocker.report())
+
         # Keep the browser open for a few seconds to see the result, then close
         time.sleep(10)
 
@@ -270,4 +498,10 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.listing:
+        main_listing(args)
+    elif args.batch:
+        main_batch(args)
+    else:
+        main()
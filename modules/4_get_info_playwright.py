@@ -3,29 +3,66 @@ This script uses Playwright and makes some actions:
 load page, enter search text,
 click search button and first product of the list,
 parse product data and save to DB
-"""
 
-import os
+The product data is extracted by one page.evaluate call (--extract js, default),
+by the locators (--extract locators) or from the page HTML by lxml (--extract html).
 
-os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"  # noqa
+With --listing the tiles of the search results / category pages are saved
+(prices and availability), the product pages are queued only when needed.
 
+With --pool the product links are taken from the DB queue and scraped
+by a pool of browser contexts (async API), the browser is kept alive for the whole run.
+"""
+
+import argparse
+import asyncio
+import os
 import subprocess
 from pprint import pprint  # noqa
 from sys import executable
 
+from django.utils import timezone
+from playwright.async_api import Error as AsyncPlaywrightError
+from playwright.async_api import Page as AsyncPage
 from playwright.sync_api import sync_playwright, Page
 
 from load_django import *  # noqa
+import playwright_pool
+from brain_site import BASE_URL
+from dom_extract import EXTRACT_LISTING_JS, EXTRACT_PRODUCT_JS, to_product_info
+from listing_store import MAX_PAGES, ListingStore
 from parser_app.models import Status, ProductInfo
+from parser_app.normalize import normalize_product_info
+from price_tracker import PriceTracker
+from product_parser import PARSERS
+from product_store import CLAIM_SIZE, ProductStore, claim_products
+from rate_limiter import HostRateLimiter
+from resource_blocking import INTERACTIVE_RESOURCE_TYPES, ResourceBlocker
+
+
+def chromium_installed() -> bool:
+    """
+    Check the Chromium of Playwright is already installed
+    """
+    try:
+        with sync_playwright() as p:
+            return os.path.exists(p.chromium.executable_path)
+    except Exception:
+        return False
 
 
 def install_playwright_browsers():
     """
-    Install playwright browsers
+    Install playwright browsers (skipped when Chromium is already installed)
     """
+    if chromium_installed():
+        return
+
     print("🤖 Checking/Installing Playwright browsers...")
     try:
-        subprocess.run([executable, "-m", "playwright", "install", "chromium"])
+        subprocess.run(
+            [executable, "-m", "playwright", "install", "chromium"], check=True
+        )
         print("✅ Browsers installed successfully.")
     except subprocess.CalledProcessError as e:
         print(f"❌ Failed to install browsers: {e}")
@@ -201,9 +238,34 @@ def parse_product_data(page) -> dict | None:
     return product_info
 
 
-def steps(page) -> None:
+def extract_product_data(page: Page) -> dict:
+    """
+    Extract product data by one page.evaluate call (one round-trip)
+    """
+    return to_product_info(page.evaluate(EXTRACT_PRODUCT_JS))
+
+
+def extract_product_html(page: Page) -> dict:
+    """
+    Extract product data from the page HTML by lxml
+    """
+    return PARSERS["lxml"](page.content())
+
+
+# Extraction modes of the opened product page
+EXTRACTORS = {
+    "js": extract_product_data,
+    "locators": parse_product_data,
+    "html": extract_product_html,
+}
+
+# Extraction mode
+EXTRACT = "js"
+
+
+def steps(page, tracker: PriceTracker, extract: str = EXTRACT) -> None:
     # Step 1: Open the main page
-    url = "https://brain.com.ua/"
+    url = BASE_URL
     print(f"Step 1: Navigating to {url}")
     open_page(page, url)
 
@@ -221,26 +283,235 @@ def steps(page) -> None:
 
     # Step 5: Parse product info
     print("Step 5: Parse product details...")
-    data = parse_product_data(page)
+    data = EXTRACTORS[extract](page)
 
     # Step 6: Save to DB
-    save_to_db(page, data)
+    save_to_db(page, data, tracker)
 
     # pprint(data)
 
 
-def save_to_db(page: Page, data: dict) -> None:
+def save_to_db(page: Page, data: dict, tracker: PriceTracker) -> None:
     # Saving product_info into DB
+    normalize_product_info(data)
     data["link"] = page.url
     data["status"] = Status.DONE
+    data["details_scraped_at"] = timezone.now()
+
+    # The product can be known already (e.g. added by the listing refresh)
+    product, _ = ProductInfo.objects.update_or_create(link=data["link"], defaults=data)
+
+    # Price history (only if the price has changed), one tracker for the whole run
+    tracker.record(product.id, product.price_regular_minor, product.price_sale_minor)
+
+
+def scrape_listing(
+    page: Page, url: str, store: ListingStore, max_pages: int = MAX_PAGES
+) -> None:
+    """
+    Save the tiles of the listing and its next pages (one page.evaluate per page)
+    """
+    seen = set()
 
-    ProductInfo.objects.get_or_create(**data)
+    while url and url not in seen and len(seen) < max_pages:
+        seen.add(url)
+        print(f"📄 Listing page {len(seen)}: {url}")
 
+        open_page(page, url)
+        result = page.evaluate(EXTRACT_LISTING_JS)
+        store.save_tiles(result["tiles"])
 
-def main() -> None:
+        url = result["next_page"]
+
+
+def main_listing(args: argparse.Namespace) -> None:
+    """
+    Refresh the prices from the listing pages
+    """
+    # The sync API runs an event loop in this thread, Django must allow the ORM calls
+    os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
+
+    store = ListingStore()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=args.headless)
+        page = browser.new_page()
+
+        if args.block:
+            ResourceBlocker().attach(page)
+
+        try:
+            for url in args.listing:
+                scrape_listing(page, url, store, args.max_pages)
+        finally:
+            # Save the rest of the buffers
+            store.close()
+            browser.close()
+
+    print(store.report())
+
+
+async def scrape_product(
+    page: AsyncPage,
+    parsed_data: ProductInfo,
+    store: ProductStore,
+    limiter: HostRateLimiter,
+    extract: str = EXTRACT,
+) -> dict | None:
+    """
+    Open the product page on the page of the pool, parse it and save (pool mode).
+    The product data is taken by one call: the record extracted in the page (js)
+    or the rendered HTML, which is parsed by lxml (html).
+    :return: parsed product info, None if the page wasn't opened
+    """
+    await limiter.wait_async(parsed_data.link)
+
+    try:
+        response = await page.goto(parsed_data.link, wait_until="domcontentloaded")
+        if response is not None:
+            limiter.feedback(
+                parsed_data.link,
+                response.status,
+                await response.header_value("retry-after"),
+            )
+
+        if response is None or not response.ok:
+            status = response.status if response is not None else None
+            await asyncio.to_thread(
+                store.save_failed_attempt, parsed_data, f"HTTP {status}", status
+            )
+            return None
+
+        if extract == "js":
+            product_info = to_product_info(await page.evaluate(EXTRACT_PRODUCT_JS))
+        else:
+            html = await page.content()
+            product_info = await asyncio.to_thread(PARSERS["lxml"], html)
+    except AsyncPlaywrightError as e:
+        print(f"❌ Error opening {parsed_data.link}: {e}")
+        await asyncio.to_thread(store.save_failed_attempt, parsed_data, str(e))
+        return None
+    except Exception as e:
+        print(f"❌ Error parsing {parsed_data.link}: {e}")
+        # TO DO: logging
+        await asyncio.to_thread(store.save_failed_attempt, parsed_data, str(e))
+        return None
+
+    try:
+        # The ORM is sync only, so it runs in a thread (no DJANGO_ALLOW_ASYNC_UNSAFE)
+        await asyncio.to_thread(store.save, parsed_data, product_info)
+    except Exception as e:
+        print(f"❌ Error saving {parsed_data.link}: {e}")
+        # TO DO: logging
+        await asyncio.to_thread(store.save_failed_attempt, parsed_data, str(e))
+        return None
+
+    return product_info
+
+
+def main_pool(args: argparse.Namespace) -> None:
+    """
+    Scrape the product links of the DB queue by the pool of browser contexts
+    """
+    store = ProductStore()
+    store.track_prices()
+    limiter = HostRateLimiter()
+    blocker = ResourceBlocker() if args.block else None
+
+    async def handler(page: AsyncPage, parsed_data: ProductInfo) -> None:
+        await scrape_product(page, parsed_data, store, limiter, args.extract)
+
+    try:
+        asyncio.run(
+            playwright_pool.run(
+                claim_products(args.claim_size),
+                handler,
+                contexts=args.contexts,
+                pages_per_context=args.pages,
+                headless=args.headless,
+                on_context=blocker.attach_async if blocker else None,
+            )
+        )
+    finally:
+        # Save the rest of the buffers
+        store.close()
+
+        if blocker:
+            print(blocker.report())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parse product data by Playwright")
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Scrape the NEW products of the DB by the pool of browser contexts",
+    )
+    parser.add_argument(
+        "--listing",
+        nargs="+",
+        metavar="URL",
+        help="Save the tiles of the search results / category pages",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=MAX_PAGES,
+        help="Max pages of one listing",
+    )
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=playwright_pool.CONTEXTS,
+        help="Browser contexts of the pool",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=playwright_pool.PAGES_PER_CONTEXT,
+        help="Pages of one browser context",
+    )
+    parser.add_argument(
+        "--headless",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run the browser of the pool / listing mode without the window",
+    )
+    parser.add_argument(
+        "--claim-size",
+        type=int,
+        default=CLAIM_SIZE,
+        help="Products reserved by one claim",
+    )
+    parser.add_argument(
+        "--extract",
+        choices=EXTRACTORS,
+        default=EXTRACT,
+        help="Extraction of the product data (the pool supports js and html)",
+    )
+    parser.add_argument(
+        "--block",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Block the images, fonts, styles (not in the search flow), analytics and ads",
+    )
+
+    args = parser.parse_args()
+    if args.pool and args.extract == "locators":
+        parser.error("the pool supports --extract js or html")
+
+    return args
+
+
+def main(block: bool = True, extract: str = EXTRACT) -> None:
     """
     Main function
+    :param block: block the heavy resources
+    :param extract: extraction mode, see EXTRACTORS
     """
+    # The sync API runs an event loop in this thread, Django must allow the ORM calls
+    os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
+
     with sync_playwright() as p:
         # Launch browser in headful mode to see the actions (headless=False)
         browser = p.chromium.launch(headless=False)
@@ -248,8 +519,17 @@ def main() -> None:
         # Create a new page context
         page = browser.new_page()
 
+        # The search is click-driven, the styles are kept
+        blocker = ResourceBlocker(INTERACTIVE_RESOURCE_TYPES) if block else None
+        if blocker:
+            blocker.attach(page)
+
         # Run actions
-        steps(page)
+        with PriceTracker(preload=False) as tracker:
+            steps(page, tracker, extract)
+
+        if blocker:
+            print(blocker.report())
 
         # Close browser
         browser.close()
@@ -258,4 +538,10 @@ def main() -> None:
 if __name__ == "__main__":
     install_playwright_browsers()
 
-    main()
+    args = parse_args()
+    if args.listing:
+        main_listing(args)
+    elif args.pool:
+        main_pool(args)
+    else:
+        main(args.block, args.extract)
@@ -0,0 +1,263 @@
+"""
+This script scrapes the NEW products by the cheapest engine, which works
+
+Every product is fetched by the HTTP engine (asyncio, the same handling as
+2_get_info.py) first. When the page is JS-gated or the required fields are
+missing, the product is sent to the pool of browser contexts (Playwright).
+The HTTP results are counted per URL pattern (engine_router), so the URLs
+of the patterns, which usually fail over HTTP, go to the browser directly.
+
+Both engines run at the same time: the HTTP engine in its own thread,
+the browser pool takes its products from the queue as they come.
+"""
+
+import argparse
+import asyncio
+import queue
+import threading
+from typing import Iterable, Iterator
+
+from aiohttp import ClientResponseError
+
+from load_django import *  # noqa
+import async_engine
+import http_cache
+import playwright_pool
+from async_engine import FetchResponse
+from brain_site import COOKIES, HEADERS
+from engine_router import (
+    BROWSER,
+    JS_GATE_STATUSES,
+    ROUTES_FILE,
+    EngineRouter,
+    is_js_gated,
+    missing_fields,
+)
+from parser_app.models import ProductInfo
+from product_store import CLAIM_SIZE, claim_products
+from rate_limiter import HostRateLimiter
+from resource_blocking import ResourceBlocker
+from script_loader import load_script
+
+get_info = load_script("2_get_info")
+get_info_playwright = load_script("4_get_info_playwright")
+
+# Products waiting for the browser, the HTTP engine slows down when it's full
+# (so the claimed products don't wait longer than their lease)
+BROWSER_QUEUE_SIZE = 100
+
+# End of the browser products
+_END = object()
+
+
+class HybridDispatcher:
+    """
+    Sends the products to the HTTP engine or to the browser pool
+    """
+
+    def __init__(self, router: EngineRouter) -> None:
+        self.router = router
+        self.store = get_info.store
+        self.browser_queue: queue.Queue = queue.Queue(maxsize=BROWSER_QUEUE_SIZE)
+
+        self.http_done = 0
+        self.browser_sent = 0
+        self._lock = threading.Lock()
+
+    def to_browser(self, parsed_data: ProductInfo, reason: str) -> None:
+        print(f"🌐 {parsed_data.link} goes to the browser: {reason}")
+
+        with self._lock:
+            self.browser_sent += 1
+
+        self.browser_queue.put(parsed_data)
+
+    def http_items(self, items: Iterable[ProductInfo]) -> Iterator[ProductInfo]:
+        """
+        Products of the HTTP engine, the ones of the browser patterns are sent directly
+        """
+        for parsed_data in items:
+            if self.router.engine_for(parsed_data.link) == BROWSER:
+                self.to_browser(parsed_data, "URL pattern")
+            else:
+                yield parsed_data
+
+    def handle_http_page(
+        self, parsed_data: ProductInfo, response: FetchResponse
+    ) -> None:
+        """
+        Parse the page fetched by HTTP, save it or send it to the browser
+        """
+        product_info = None
+        if not http_cache.is_unchanged(parsed_data, response.status, response.content):
+            product_info = get_info.parse_html(response.text)
+
+            # The page isn't archived and its validators aren't kept
+            if missing := missing_fields(product_info):
+                self.router.record(parsed_data.link, ok=False)
+                reason = (
+                    "JS-gated page"
+                    if is_js_gated(response.status, response.text)
+                    else f"missing {', '.join(missing)}"
+                )
+                self.to_browser(parsed_data, reason)
+                return
+
+        html = get_info.accept_product_page(parsed_data, response)
+        if html is None:
+            # Not modified, the stored data is up to date
+            self.router.record(parsed_data.link, ok=True)
+            return
+
+        self.router.record(parsed_data.link, ok=True)
+        self.store.save(parsed_data, product_info)
+
+        with self._lock:
+            self.http_done += 1
+
+    def handle_http_error(self, parsed_data: ProductInfo, error: Exception) -> None:
+        """
+        The blocked pages go to the browser, the rest of the errors are retried later
+        """
+        if isinstance(error, ClientResponseError) and error.status in JS_GATE_STATUSES:
+            self.router.record(parsed_data.link, ok=False)
+            self.to_browser(parsed_data, f"HTTP {error.status}")
+            return
+
+        get_info.save_failed_attempt(parsed_data, error)
+
+    def run_http(self, items: Iterable[ProductInfo], concurrency: int) -> None:
+        """
+        HTTP engine (runs in its own thread), ends the browser queue when it's done
+        """
+        try:
+            asyncio.run(
+                async_engine.run(
+                    self.http_items(items),
+                    get_url=lambda product: product.link,
+                    handler=self.handle_http_page,
+                    concurrency=concurrency,
+                    get_headers=http_cache.conditional_headers,
+                    on_error=self.handle_http_error,
+                    headers=HEADERS,
+                    cookies=COOKIES,
+                    limiter=get_info.limiter,
+                )
+            )
+        finally:
+            self.browser_queue.put(_END)
+
+    def browser_items(self) -> Iterator[ProductInfo]:
+        while (parsed_data := self.browser_queue.get()) is not _END:
+            yield parsed_data
+
+    def run(
+        self,
+        items: Iterable[ProductInfo],
+        concurrency: int,
+        contexts: int,
+        pages_per_context: int,
+    ) -> None:
+        """
+        Run the HTTP engine and the browser pool together
+        """
+        http_thread = threading.Thread(
+            target=self.run_http, args=(items, concurrency), daemon=True
+        )
+        http_thread.start()
+
+        # The browser engine has its own rate limiter, the HTTP one isn't blocked by it
+        limiter = HostRateLimiter()
+        blocker = ResourceBlocker()
+
+        async def handler(page, parsed_data: ProductInfo) -> None:
+            await get_info_playwright.scrape_product(
+                page, parsed_data, self.store, limiter
+            )
+
+        asyncio.run(
+            playwright_pool.run(
+                self.browser_items(),
+                handler,
+                contexts=contexts,
+                pages_per_context=pages_per_context,
+                on_context=blocker.attach_async,
+            )
+        )
+
+        http_thread.join()
+
+        print(blocker.report())
+
+    def report(self) -> str:
+        return (
+            f"✅ Saved {self.http_done} products by HTTP, "
+            f"sent {self.browser_sent} to the browser"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Parse product data by HTTP with the browser fallback"
+    )
+    parser.add_argument(
+        "--claim-size",
+        type=int,
+        default=CLAIM_SIZE,
+        help="Products reserved by one claim",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=get_info.CONCURRENCY,
+        help="Max pages in flight for the HTTP engine",
+    )
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=playwright_pool.CONTEXTS,
+        help="Browser contexts of the pool",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=playwright_pool.PAGES_PER_CONTEXT,
+        help="Pages of one browser context",
+    )
+    parser.add_argument(
+        "--routes",
+        default=ROUTES_FILE,
+        help="File with the HTTP results per URL pattern",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    get_info_playwright.install_playwright_browsers()
+
+    router = EngineRouter(args.routes)
+    dispatcher = HybridDispatcher(router)
+    dispatcher.store.track_prices()
+
+    try:
+        dispatcher.run(
+            claim_products(args.claim_size),
+            concurrency=args.concurrency,
+            contexts=args.contexts,
+            pages_per_context=args.pages,
+        )
+    finally:
+        # Save the rest of the buffers and the routes
+        dispatcher.store.close()
+        get_info.archive.close()
+        router.save()
+
+    print(dispatcher.report())
+    print(router.report())
+
+
+if __name__ == "__main__":
+    main()
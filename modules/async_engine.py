@@ -0,0 +1,166 @@
+"""
+Asyncio fetch engine.
+
+One aiohttp connection pool is shared by a fixed number of worker coroutines,
+so the number of pages in flight is limited by CONCURRENCY, not by OS threads.
+The fetched response is handed to a regular (sync) handler, which is run in a thread
+because the parsing is CPU bound and the Django ORM is sync only.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+
+from item_feed import aiter_in_thread
+from rate_limiter import HostRateLimiter
+
+# Max pages in flight
+CONCURRENCY = 50
+
+# Max seconds for one request (connect + read)
+TIMEOUT = 30
+
+
+@dataclass
+class FetchResponse:
+    """
+    The part of the response the handlers need
+    """
+
+    url: str
+    status: int
+    headers: Mapping[str, str]
+    content: bytes
+    encoding: str = "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class AsyncFetcher:
+    """
+    Wrapper around the aiohttp session with its own connection pool
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CONCURRENCY,
+        headers: dict | None = None,
+        cookies: dict | None = None,
+        timeout: int = TIMEOUT,
+        limiter: HostRateLimiter | None = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.headers = headers or {}
+        self.cookies = cookies or {}
+        self.timeout = timeout
+        self.limiter = limiter
+        self.session: ClientSession | None = None
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        connector = TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            ttl_dns_cache=300,
+        )
+        self.session = ClientSession(
+            connector=connector,
+            headers=self.headers,
+            cookies=self.cookies,
+            timeout=ClientTimeout(total=self.timeout),
+        )
+
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.session.close()
+
+    async def fetch(self, url: str, headers: dict | None = None) -> FetchResponse:
+        """
+        Get the page, raises ClientError / TimeoutError on any network or HTTP error
+        """
+        if self.limiter:
+            await self.limiter.wait_async(url)
+
+        async with self.session.get(url, headers=headers) as response:
+            if self.limiter:
+                self.limiter.feedback(
+                    url, response.status, response.headers.get("Retry-After")
+                )
+
+            response.raise_for_status()  # Raises an error for 4xx or 5xx codes
+
+            return FetchResponse(
+                url=url,
+                status=response.status,
+                headers=response.headers.copy(),
+                content=await response.read(),
+                encoding=response.get_encoding(),
+            )
+
+
+async def run(
+    items: Iterable[Any],
+    get_url: Callable[[Any], str],
+    handler: Callable[[Any, FetchResponse], Any],
+    concurrency: int = CONCURRENCY,
+    get_headers: Callable[[Any], dict] | None = None,
+    on_error: Callable[[Any, Exception], Any] | None = None,
+    **fetcher_kwargs,
+) -> None:
+    """
+    Fetch the URL of every item and pass (item, response) to the handler
+    :param items: queue items, e.g. ProductInfo instances
+    :param get_url: returns the URL of the item
+    :param handler: sync function, runs in a worker thread
+    :param concurrency: max pages in flight
+    :param get_headers: returns the extra request headers of the item
+    :param on_error: sync function, gets (item, error) of the failed fetch or handler
+    :return:
+    """
+    # The queue is bounded, so the producer waits for the free workers
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async with AsyncFetcher(concurrency=concurrency, **fetcher_kwargs) as fetcher:
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                error = None
+                try:
+                    headers = get_headers(item) if get_headers else None
+                    response = await fetcher.fetch(get_url(item), headers=headers)
+                    await asyncio.to_thread(handler, item, response)
+                except (ClientError, asyncio.TimeoutError) as e:
+                    print(f"❌ Error fetching {get_url(item)}: {e}")
+                    error = e
+                except Exception as e:
+                    print(f"❌ Error handling {get_url(item)}: {e}")
+                    # TO DO: logging
+                    error = e
+
+                # Every failed item gets its retry (or the status 'Failed')
+                try:
+                    if error is not None and on_error:
+                        await asyncio.to_thread(on_error, item, error)
+                except Exception as e:
+                    print(f"❌ Error saving the failure of {get_url(item)}: {e}")
+                    # TO DO: logging
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+        async for item in aiter_in_thread(items):
+            await queue.put(item)
+
+        # Wait for all queued items, then stop the workers
+        await queue.join()
+
+        for task in workers:
+            task.cancel()
+
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,341 @@
+"""
+Offline benchmark of the extraction backends (product_parser.PARSERS).
+
+Every backend parses the same saved product pages: the HTML files of the
+fixtures directory or the pages of the page archive (--from-archive).
+It reports pages per second, the per-page latency percentiles and the peak
+memory of parsing one page (see measure_memory), and checks the results
+of every backend are identical to the reference backend field by field.
+
+With --baseline it's the regression gate: the exit code is 1 when a backend
+is slower than MAX_SLOWDOWN of its baseline throughput or the results differ.
+
+    python bench_parsers.py
+    python bench_parsers.py --save-baseline
+    python bench_parsers.py --baseline
+    python bench_parsers.py --from-archive --limit 500
+"""
+
+import argparse
+import ctypes
+import gc
+import json
+import multiprocessing
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from page_archive import PageArchive
+from product_parser import PARSERS
+
+# Saved product pages (the root of the repo)
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "fixtures" / "products"
+
+# Throughput of the last accepted run (machine specific, so it isn't committed)
+BASELINE_FILE = (
+    Path(__file__).resolve().parent.parent / "fixtures" / "bench_baseline.json"
+)
+
+# The results of the other backends are compared to this one
+REFERENCE = "bs4"
+
+# Passes over all the pages (the 1st one warms up and isn't measured)
+ROUNDS = 5
+
+# The gate fails when the throughput falls below this share of the baseline
+MAX_SLOWDOWN = 0.8
+
+# Memory counters of the process (Linux)
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def load_fixtures(path: Path = FIXTURES_DIR) -> list[tuple[str, str]]:
+    """
+    (name, html) of the saved pages
+    """
+    return [
+        (file.name, file.read_text(encoding="utf-8"))
+        for file in sorted(Path(path).glob("*.html"))
+    ]
+
+
+def load_archive(limit: int | None = None) -> list[tuple[str, str]]:
+    """
+    (link, html) of the last archived page of every link
+    """
+    pages = []
+    for record, html in PageArchive().iter_pages():
+        pages.append((record["link"], html))
+
+        if limit and len(pages) >= limit:
+            break
+
+    return pages
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, round(share * (len(values) - 1)))
+
+    return values[index]
+
+
+def _memory_status(key: str) -> int:
+    """
+    Counter of /proc/self/status (VmRSS, VmHWM), bytes
+    """
+    match = re.search(rf"^{key}:\s+(\d+) kB", PROC_STATUS.read_text(), re.MULTILINE)
+    return int(match[1]) * 1024
+
+
+def _peak_memory(backend: str, pages: list[tuple[str, str]]) -> int:
+    """
+    Max growth of the peak RSS of this process while parsing one page, bytes
+    """
+    libc = ctypes.CDLL(None)
+    parse = PARSERS[backend]
+
+    # Warm-up: the imports and the lazy initialization aren't counted
+    for _, html in pages:
+        parse(html)
+
+    peak = 0
+    for _, html in pages:
+        # The freed memory is given back, so the page can't reuse it unnoticed
+        gc.collect()
+        libc.malloc_trim(0)
+
+        PROC_CLEAR_REFS.write_text("5")  # resets VmHWM to the current RSS
+        before = _memory_status("VmRSS")
+        parse(html)
+        peak = max(peak, _memory_status("VmHWM") - before)
+
+    return peak
+
+
+def measure_memory(backend: str, pages: list[tuple[str, str]]) -> int | None:
+    """
+    Peak memory of parsing one page by the backend, the C memory of libxml2 included
+    (the max over the pages). It's measured in a new process with the system malloc
+    (PYTHONMALLOC=malloc), because the pymalloc arenas keep the freed memory
+    of the previous pages and hide the growth.
+    :return: bytes, None - not supported (it needs Linux and glibc)
+    """
+    if not PROC_CLEAR_REFS.exists():
+        return None
+
+    context = multiprocessing.get_context("spawn")
+
+    # The new process reads PYTHONMALLOC at the start
+    pymalloc = os.environ.get("PYTHONMALLOC")
+    os.environ["PYTHONMALLOC"] = "malloc"
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            return executor.submit(_peak_memory, backend, pages).result()
+    except (OSError, AttributeError) as e:
+        # No /proc/self/clear_refs access or no malloc_trim (not glibc)
+        print(f"❌ Error measuring the memory: {e}")
+        return None
+    finally:
+        if pymalloc is None:
+            del os.environ["PYTHONMALLOC"]
+        else:
+            os.environ["PYTHONMALLOC"] = pymalloc
+
+
+def measure(backend: str, pages: list[tuple[str, str]], rounds: int = ROUNDS) -> dict:
+    """
+    Throughput, latency and peak memory of one backend
+    :param backend: name of the backend, see PARSERS
+    :param pages: (name, html)
+    :param rounds: passes over the pages, the 1st one is the warm-up
+    :return:
+    """
+    parse = PARSERS[backend]
+
+    for _, html in pages:
+        parse(html)
+
+    latencies = []
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(rounds - 1):
+        for _, html in pages:
+            page_started = time.perf_counter()
+            parse(html)
+            latencies.append(time.perf_counter() - page_started)
+    elapsed = time.perf_counter() - started
+
+    memory = measure_memory(backend, pages)
+
+    return {
+        "pages_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "peak_mib": memory / 1024 / 1024 if memory is not None else None,
+    }
+
+
+def compare(
+    pages: list[tuple[str, str]], backends: list[str], reference: str = REFERENCE
+) -> list[str]:
+    """
+    Fields of the pages, which differ from the reference backend
+    :return: "page: backend.field" of every difference
+    """
+    differences = []
+    for name, html in pages:
+        expected = PARSERS[reference](html)
+
+        for backend in backends:
+            if backend == reference:
+                continue
+
+            result = PARSERS[backend](html)
+            for field in sorted(set(expected) | set(result)):
+                if expected.get(field) != result.get(field):
+                    differences.append(f"{name}: {backend}.{field}")
+
+    return differences
+
+
+def check_baseline(
+    results: dict[str, dict], baseline: dict[str, dict], max_slowdown: float
+) -> list[str]:
+    """
+    Backends, which are slower than the allowed share of the baseline
+    """
+    regressions = []
+    for backend, result in results.items():
+        if backend not in baseline:
+            continue
+
+        expected = baseline[backend]["pages_per_sec"]
+        if result["pages_per_sec"] < expected * max_slowdown:
+            regressions.append(
+                f"{backend}: {result['pages_per_sec']:.1f} pages/sec, "
+                f"baseline {expected:.1f}"
+            )
+
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark of the extraction backends")
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=FIXTURES_DIR,
+        help="Directory with the saved product pages (*.html)",
+    )
+    parser.add_argument(
+        "--from-archive",
+        action="store_true",
+        help="Use the pages of the page archive instead of the fixtures",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Max pages of the archive",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=list(PARSERS),
+        default=list(PARSERS),
+        help="Backends to measure",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=ROUNDS,
+        help="Passes over all the pages (the 1st one is the warm-up)",
+    )
+    parser.add_argument(
+        "--baseline",
+        nargs="?",
+        type=Path,
+        const=BASELINE_FILE,
+        help="Fail when a backend is slower than its baseline",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        type=Path,
+        const=BASELINE_FILE,
+        help="Save the results as the baseline",
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=MAX_SLOWDOWN,
+        help="Min share of the baseline throughput",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    pages = (
+        load_archive(args.limit) if args.from_archive else load_fixtures(args.fixtures)
+    )
+    if not pages:
+        print("❌ Error no pages to parse")
+        return 1
+
+    size = sum(len(html) for _, html in pages) / len(pages) / 1024
+    print(f"📄 {len(pages)} pages, {size:.0f} KiB on average, {args.rounds} rounds")
+
+    results = {}
+    for backend in args.backends:
+        results[backend] = result = measure(backend, pages, args.rounds)
+        peak = "n/a" if result["peak_mib"] is None else f"{result['peak_mib']:.1f}"
+        print(
+            f"{backend:>6}: {result['pages_per_sec']:8.1f} pages/sec | "
+            f"p50 {result['p50_ms']:7.2f} ms | p90 {result['p90_ms']:7.2f} ms | "
+            f"p99 {result['p99_ms']:7.2f} ms | peak {peak:>6} MiB per page"
+        )
+
+    failed = False
+
+    if REFERENCE in args.backends:
+        if differences := compare(pages, args.backends):
+            failed = True
+            print(f"❌ {len(differences)} fields differ from {REFERENCE}:")
+            for difference in differences[:50]:
+                print(f"    {difference}")
+        else:
+            print(f"✅ The results are identical to {REFERENCE}")
+
+    if args.baseline:
+        if not args.baseline.exists():
+            print(f"❌ Error no baseline {args.baseline}, save it by --save-baseline")
+            return 1
+
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if regressions := check_baseline(results, baseline, args.max_slowdown):
+            failed = True
+            print("❌ Throughput regression:")
+            for regression in regressions:
+                print(f"    {regression}")
+        else:
+            print("✅ No throughput regression")
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"💾 Baseline saved to {args.save_baseline}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Settings of the requests to https://brain.com.ua shared by the HTTP scrapers
+"""
+
+import hashlib
+import os
+import re
+
+# Replaced by the local fixture server in the load tests (BRAIN_BASE_URL)
+BASE_URL = os.getenv("BRAIN_BASE_URL", "https://brain.com.ua/")
+
+# Global headers (these will be sent with every request)
+HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "accept-language": "en-GB,en;q=0.9,ru-RU;q=0.8,ru;q=0.7,en-US;q=0.6",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36",
+    "sec-ch-ua-platform": '"Windows"',
+    "dnt": "1",
+}
+
+# Specific cookies, this mimics a returning user with an active session
+COOKIES = {
+    "PHPSESSID": "s0449bcr0ud0eeu1gsemb3ckgh",
+    "Lang": "ua",
+    "CityID": "23562",
+    "view_type": "grid",
+}
+
+# Product page: ...-p1145443.html
+PRODUCT_LINK_RE = re.compile(r"-p\d+\.html$")
+
+
+def link_key(link: str) -> bytes:
+    """
+    8-byte hash of the link, the set of hashes is much smaller than the set of URLs
+    """
+    return hashlib.blake2b(link.encode(), digest_size=8).digest()
@@ -0,0 +1,173 @@
+"""
+Write-behind buffer for the parsed products.
+
+The workers only add the instances to the buffer, and the buffer is flushed
+to the DB by one bulk_update when it has BATCH_SIZE instances or
+FLUSH_INTERVAL seconds have passed since the last flush (whichever is first).
+The rest of the buffer is flushed on close() and on the interpreter exit.
+When a batch fails, its instances are saved one by one (only the bad rows are lost).
+bulk_update doesn't call save(), so the auto_now fields of the saved fields
+(updated_at) are set by the buffer when an instance is added.
+
+BulkWriter updates the existing rows (bulk_update),
+BulkCreator inserts the new ones (bulk_create, the duplicates are ignored).
+"""
+
+import atexit
+import threading
+import time
+
+from django.db import close_old_connections, connection, models
+
+# Max instances in one bulk_update
+BATCH_SIZE = 500
+
+# Max seconds an instance waits in the buffer
+FLUSH_INTERVAL = 5.0
+
+
+class BulkWriter:
+    """
+    Thread-safe buffer, which saves the given fields of the instances by bulk_update
+    """
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        fields: list[str],
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        self.model = model
+        self.fields = fields
+
+        # Saved fields with auto_now (e.g. updated_at), see add()
+        self._auto_now_fields = [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False) and field.name in fields
+        ]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # The persistent connection of the long-running worker (CONN_MAX_AGE) may be
+        # broken (the DB restart), so it's checked before every flush. The connection
+        # of a one-shot script (CONN_MAX_AGE=0) isn't reopened for every batch.
+        self.check_connection = connection.settings_dict["CONN_MAX_AGE"] != 0
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        # Background flush, so a slow queue doesn't keep the data in the buffer
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, instance: models.Model) -> None:
+        """
+        Add the instance to the buffer and flush the buffer if it is full
+        """
+        for field in self._auto_now_fields:
+            field.pre_save(instance, add=False)  # sets the current time
+
+        with self._lock:
+            self._buffer.append(instance)
+            is_full = len(self._buffer) >= self.batch_size
+
+        if is_full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Save the buffered instances, returns the number of saved instances
+        """
+        # Only one flush at a time, the workers keep adding to the new buffer
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+
+            if not batch:
+                return 0
+
+            if self.check_connection:
+                close_old_connections()
+
+            try:
+                self._save(batch)
+            except Exception as e:
+                print(f"❌ Error saving {len(batch)} {self.model.__name__}: {e}")
+                # TO DO: logging
+                return self._save_each(batch)
+
+            return len(batch)
+
+    def _save_each(self, batch: list[models.Model]) -> int:
+        """
+        Save the instances of the failed batch one by one, so only the bad ones are lost
+        """
+        saved = 0
+        for instance in batch:
+            try:
+                self._save([instance])
+            except Exception as e:
+                print(f"❌ Error saving {self.model.__name__} {instance.pk}: {e}")
+                # TO DO: logging
+                continue
+
+            saved += 1
+
+        return saved
+
+    def _save(self, batch: list[models.Model]) -> None:
+        self.model.objects.bulk_update(batch, self.fields, batch_size=self.batch_size)
+
+    def close(self) -> None:
+        """
+        Stop the background flush and save the rest of the buffer
+        """
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._thread.join()
+
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval / 2):
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                # The thread lives as long as the buffer, so its connection is
+                # checked (and reopened if it's broken) before the timed flush
+                close_old_connections()
+                self.flush()
+
+        close_old_connections()
+
+
+class BulkCreator(BulkWriter):
+    """
+    Thread-safe buffer, which inserts the instances by bulk_create.
+    The rows, which already exist (by any unique constraint), are skipped.
+    """
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        super().__init__(model, [], batch_size, flush_interval)
+
+    def _save(self, batch: list[models.Model]) -> None:
+        self.model.objects.bulk_create(
+            batch, batch_size=self.batch_size, ignore_conflicts=True
+        )
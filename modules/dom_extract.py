@@ -0,0 +1,217 @@
+"""
+In-page extraction of the product data for the browser scrapers.
+
+EXTRACT_PRODUCT_JS is evaluated in the page and returns the whole product
+record in one call (Playwright page.evaluate, Selenium execute_script),
+instead of a driver round-trip for every field and every characteristic span.
+It evaluates the compiled XPath expressions of the lxml backend
+(product_parser), so the browser scrapers and the HTTP scrapers select the same
+nodes, and to_product_info() turns its result into the same product_info dict.
+
+EXTRACT_LISTING_JS returns all the product tiles of a listing page
+(search results, category) and the URL of the next page.
+"""
+
+import json
+
+from product_parser import (
+    BUILTIN_MEMORY_XPATH,
+    CHARACTERISTIC_COLS_XPATH,
+    CHARACTERISTIC_ITEMS_XPATH,
+    CHARACTERISTIC_TITLE_XPATH,
+    CHARACTERISTICS_XPATH,
+    COLOR_XPATH,
+    IMAGES_XPATH,
+    MANUFACTURER_XPATH,
+    NAME_XPATH,
+    PRICES_XPATH,
+    REVIEWS_COUNT_XPATH,
+    SKU_XPATH,
+)
+
+# XPath expressions of the lxml backend, passed to the page as XPATHS
+PRODUCT_XPATHS = {
+    "name": NAME_XPATH.path,
+    "color": COLOR_XPATH.path,
+    "builtin_memory": BUILTIN_MEMORY_XPATH.path,
+    "manufacturer": MANUFACTURER_XPATH.path,
+    "sku": SKU_XPATH.path,
+    "reviews_count": REVIEWS_COUNT_XPATH.path,
+    "prices": PRICES_XPATH.path,
+    "images": IMAGES_XPATH.path,
+    "characteristics": CHARACTERISTICS_XPATH.path,
+    "characteristic_title": CHARACTERISTIC_TITLE_XPATH.path,
+    "characteristic_items": CHARACTERISTIC_ITEMS_XPATH.path,
+    "characteristic_cols": CHARACTERISTIC_COLS_XPATH.path,
+}
+
+# Arrow function, evaluated by page.evaluate(EXTRACT_PRODUCT_JS)
+# or driver.execute_script(f"return ({EXTRACT_PRODUCT_JS})()")
+EXTRACT_PRODUCT_JS = r"""
+() => {
+    const XPATHS = __PRODUCT_XPATHS__;
+    const errors = [];
+
+    const all = (xpath, context = document) => {
+        const result = document.evaluate(
+            xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+        );
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) {
+            nodes.push(result.snapshotItem(i));
+        }
+        return nodes;
+    };
+
+    const text = (node) => node.textContent.trim();
+
+    const info = {};
+
+    const saveTextValue = (attrib, xpath) => {
+        const node = all(xpath)[0];
+        if (node) {
+            info[attrib] = text(node);
+        } else {
+            info[attrib] = null;
+            errors.push(attrib);
+        }
+    };
+
+    // Name
+    saveTextValue("name", XPATHS.name);
+
+    // Color
+    saveTextValue("color", XPATHS.color);
+
+    // Built-in Memory
+    saveTextValue("builtin_memory", XPATHS.builtin_memory);
+
+    // Manufacturer
+    saveTextValue("manufacturer", XPATHS.manufacturer);
+
+    // SKU
+    saveTextValue("sku", XPATHS.sku);
+
+    // Reviews Count
+    saveTextValue("reviews_count", XPATHS.reviews_count);
+
+    // Prices
+    const prices = all(XPATHS.prices);
+    info.price_regular = prices[0] ? text(prices[0]) : null;
+    info.price_sale = prices[1] ? text(prices[1]) : null;
+
+    // Images
+    info.images = all(XPATHS.images).map(
+        (image) => image.getAttribute("src")
+    );
+
+    // Characteristics: [title, [[name, value], ...]], the pairs keep the order of the keys
+    const characteristics = [];
+    for (const characteristic of all(XPATHS.characteristics)) {
+        const title = all(XPATHS.characteristic_title, characteristic)[0];
+        if (!title) {
+            errors.push("characteristic block");
+            continue;
+        }
+
+        const items = [];
+        for (const item of all(XPATHS.characteristic_items, characteristic)) {
+            const cols = all(XPATHS.characteristic_cols, item);
+            if (cols.length < 2) {
+                continue;
+            }
+
+            const paramName = text(cols[0]);
+            const paramValue = cols[1].textContent.replace(/\u00a0/g, " ").trim();
+            items.push([paramName, paramValue]);
+
+            // Screen Diagonal
+            if (paramName === "Діагональ екрану") {
+                info.screen_diagonal = paramValue;
+            }
+
+            // Screen Resolution
+            if (paramName === "Роздільна здатність екрану") {
+                info.screen_resolution = paramValue;
+            }
+        }
+
+        characteristics.push([text(title), items]);
+    }
+    info.characteristics = characteristics;
+
+    return {product_info: info, errors: errors};
+}
+""".replace("__PRODUCT_XPATHS__", json.dumps(PRODUCT_XPATHS, ensure_ascii=False))
+
+
+def to_product_info(result: dict) -> dict:
+    """
+    Product info of the EXTRACT_PRODUCT_JS result (the same as parse_product_data)
+    :param result: {"product_info": ..., "errors": [...]}
+    :return:
+    """
+    for attrib in result["errors"]:
+        print(f"❌ Error {attrib}")
+        # TO DO: logging
+
+    product_info = result["product_info"]
+    product_info["characteristics"] = [
+        (title, dict(items)) for title, items in product_info["characteristics"]
+    ]
+
+    return product_info
+
+
+# Arrow function, returns every product tile of the listing (search results, category)
+# and the URL of the next page: {tiles: [{link, name, image, price_regular,
+# price_sale, available}, ...], next_page: url | null}
+EXTRACT_LISTING_JS = r"""
+() => {
+    const all = (xpath, context = document) => {
+        const result = document.evaluate(
+            xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+        );
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) {
+            nodes.push(result.snapshotItem(i));
+        }
+        return nodes;
+    };
+
+    const text = (node) => (node ? node.textContent.trim() : null);
+
+    const tiles = [];
+    for (const imageLink of all("//*[contains(@class, 'br-pp-img')]/a")) {
+        // The tile is the nearest block with the prices
+        const tile = all(
+            "ancestor::*[.//*[contains(@class, 'price-wrapper')]][1]", imageLink
+        )[0];
+        if (!tile) {
+            continue;
+        }
+
+        const image = all(".//img", imageLink)[0];
+        const name = all(".//*[contains(@class, 'br-pp-desc')]//a", tile)[0];
+        const prices = all(".//*[contains(@class, 'price-wrapper')]/span", tile);
+
+        tiles.push({
+            link: imageLink.href,
+            name: name ? text(name) : imageLink.getAttribute("title"),
+            image: image ? image.getAttribute("src") : null,
+            price_regular: text(prices[0]),
+            price_sale: text(prices[1]),
+            available: !tile.textContent.includes("Немає в наявності"),
+        });
+    }
+
+    const next = all(
+        "//link[@rel='next'] | //a[@rel='next'] | //*[contains(@class, 'pagination')]//a[contains(@class, 'next')]"
+    )[0];
+
+    return {
+        tiles: tiles,
+        next_page: next ? new URL(next.getAttribute("href"), location.href).href : null,
+    };
+}
+"""
@@ -0,0 +1,142 @@
+"""
+Choice of the scraping engine (HTTP or browser) by the URL pattern.
+
+The cheap HTTP engine is tried first. When the required fields of the parsed
+page are missing (e.g. the page is JS-gated), the URL is sent to the browser
+and the failure is counted for its pattern. Once a pattern fails often enough,
+its next URLs go to the browser directly (a small share of them still probes
+HTTP, so a pattern comes back when the site changes).
+The counters are kept in a JSON file between the runs.
+"""
+
+import json
+import random
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Default location of the counters (the root of the repo)
+ROUTES_FILE = Path(__file__).resolve().parent.parent / "engine_routes.json"
+
+# Fields, which must be extracted by the HTTP engine
+REQUIRED_FIELDS = ("name", "price_regular", "sku")
+
+# Texts of the pages, which need JavaScript (lower case)
+JS_GATE_MARKERS = (
+    "enable javascript",
+    "увімкніть javascript",
+    "challenge-platform",
+    "cf-browser-verification",
+)
+
+# Status codes of the HTTP engine, which are sent to the browser
+JS_GATE_STATUSES = (403,)
+
+# HTTP results of a pattern before it can be routed to the browser
+MIN_SAMPLES = 5
+
+# Share of the HTTP failures, after which the pattern goes to the browser
+FALLBACK_RATIO = 0.5
+
+# Share of the browser-routed URLs, which still try HTTP
+PROBE_RATE = 0.05
+
+# Words of the product slug in the pattern: Mobilniy_telefon_Apple_... -> Mobilniy_telefon
+SLUG_WORDS = 2
+
+HTTP = "http"
+BROWSER = "browser"
+
+
+def _fails_over_http(successes: int, failures: int) -> bool:
+    total = successes + failures
+    return total >= MIN_SAMPLES and failures / total >= FALLBACK_RATIO
+
+
+def url_pattern(url: str) -> str:
+    """
+    Pattern of the URL: the host, the directories and the first words of the slug
+    https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_16-p1145443.html
+        -> brain.com.ua/ukr/Mobilniy_telefon
+    """
+    parts = urlsplit(url)
+    *directories, slug = parts.path.split("/")
+    words = slug.split("_")[:SLUG_WORDS]
+
+    return "/".join([parts.netloc, *filter(None, directories), "_".join(words)])
+
+
+def is_js_gated(status: int, html: str) -> bool:
+    """
+    Check the fetched page is a JS challenge / stub instead of the product page.
+    Use it only for the pages without the required fields: the markers are
+    in the healthy pages too (noscript texts, the scripts injected by Cloudflare).
+    """
+    if status in JS_GATE_STATUSES:
+        return True
+
+    text = html.lower()
+    return any(marker in text for marker in JS_GATE_MARKERS)
+
+
+def missing_fields(product_info: dict | None) -> list[str]:
+    """
+    Required fields, which weren't extracted from the page
+    """
+    if not product_info:
+        return list(REQUIRED_FIELDS)
+
+    return [field for field in REQUIRED_FIELDS if product_info.get(field) is None]
+
+
+class EngineRouter:
+    """
+    HTTP results per URL pattern: {pattern: [successes, failures]}
+    """
+
+    def __init__(self, path: str | Path = ROUTES_FILE) -> None:
+        self.path = Path(path)
+        self._counters: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self._counters = json.load(f)
+
+    def engine_for(self, url: str) -> str:
+        """
+        Engine of the URL: HTTP, unless its pattern usually fails over HTTP
+        """
+        with self._lock:
+            successes, failures = self._counters.get(url_pattern(url), (0, 0))
+
+        if not _fails_over_http(successes, failures):
+            return HTTP
+
+        return HTTP if random.random() < PROBE_RATE else BROWSER
+
+    def record(self, url: str, ok: bool) -> None:
+        """
+        Count the HTTP result of the URL
+        """
+        with self._lock:
+            counters = self._counters.setdefault(url_pattern(url), [0, 0])
+            counters[0 if ok else 1] += 1
+
+    def save(self) -> None:
+        """
+        Keep the counters for the next runs
+        """
+        with self._lock:
+            data = json.dumps(self._counters, ensure_ascii=False, indent=1)
+
+        self.path.write_text(data, encoding="utf-8")
+
+    def report(self) -> str:
+        with self._lock:
+            patterns = len(self._counters)
+            browser = sum(
+                _fails_over_http(*counters) for counters in self._counters.values()
+            )
+
+        return f"🔀 {patterns} URL patterns, {browser} routed to the browser"
@@ -0,0 +1,363 @@
+"""
+Local stand-in of brain.com.ua for the end-to-end load tests.
+
+Serves the saved product pages (fixtures/products/*.html) as PRODUCTS products,
+and generates the pages around them with the markup the scrapers expect:
+- /                                     home page with the search form
+- /search/?Search=<query>&page=<n>      search results (product tiles)
+- /ukr/category/<slug>/page=<n>/        category listing with the pagination
+- /ukr/Tovar_<id>-p<id>.html            product page
+- /sitemap.xml                          all the product links
+- /__stats                              counters of the responses (JSON)
+
+The behaviour of the real site is simulated: the latency, the random 5xx
+errors, the 429 throttling (with Retry-After) over the given rate,
+and the ETag / If-None-Match (304) of the product pages.
+Point the scrapers to it by BRAIN_BASE_URL=http://127.0.0.1:8080/
+
+    python fixture_server.py --latency 0.05 --error-rate 0.01 --rate 200
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import quote
+
+from aiohttp import web
+
+# Saved product pages (the root of the repo)
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "fixtures" / "products"
+
+HOST = "127.0.0.1"
+PORT = 8080
+
+# Products of the site (ids 1..PRODUCTS)
+PRODUCTS = 1000
+
+# Tiles of one listing page
+PAGE_SIZE = 24
+
+# Mean delay of a response and its random deviation, seconds
+LATENCY = 0.05
+LATENCY_JITTER = 0.02
+
+# Share of the responses with the status 500
+ERROR_RATE = 0.0
+
+# Max requests per second, the rest get 429 (0 - no limit)
+RATE = 0.0
+
+# Value of Retry-After of 429
+RETRY_AFTER = 1
+
+CATEGORY_SLUG = "Mobilni_telefony-c1274-155"
+
+
+@dataclass
+class ServerConfig:
+    fixtures: Path = FIXTURES_DIR
+    products: int = PRODUCTS
+    page_size: int = PAGE_SIZE
+    latency: float = LATENCY
+    latency_jitter: float = LATENCY_JITTER
+    error_rate: float = ERROR_RATE
+    rate: float = RATE
+    etag: bool = True
+
+
+@dataclass
+class ServerStats:
+    statuses: Counter = field(default_factory=Counter)
+    routes: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        total = sum(self.statuses.values())
+
+        return {
+            "requests": total,
+            "requests_per_sec": round(total / elapsed, 1) if elapsed else 0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "routes": dict(self.routes),
+        }
+
+
+def product_link(product_id: int) -> str:
+    return f"/ukr/Tovar_{product_id}-p{product_id}.html"
+
+
+def product_price(product_id: int) -> str:
+    """
+    Stable price of the product: "12 345"
+    """
+    return f"{1000 + product_id * 37 % 90000:,}".replace(",", " ")
+
+
+def render_tiles(product_ids: range) -> str:
+    return "\n".join(
+        f'<div class="product-wrapper">'
+        f'<div class="br-pp-img"><a href="{product_link(i)}" title="Товар {i}">'
+        f'<img src="/static/{i}.jpg"></a></div>'
+        f'<div class="br-pp-desc"><a href="{product_link(i)}">Товар {i}</a></div>'
+        f'<div class="price-wrapper"><span>{product_price(i)}</span></div>'
+        f"{'<span>Немає в наявності</span>' if i % 10 == 0 else ''}"
+        f"</div>"
+        for i in product_ids
+    )
+
+
+def render_page(title: str, body: str, next_page: str | None = None) -> str:
+    next_link = f'<link rel="next" href="{next_page}">' if next_page else ""
+
+    return f"""<!DOCTYPE html>
+<html lang="uk"><head><meta charset="utf-8"><title>{title}</title>{next_link}</head>
+<body>
+<header><form action="/search/" method="get"><div class="header-bottom-in">
+<input type="search" name="Search"><input class="qsr-submit" type="submit" value="Знайти">
+</div></form></header>
+<h1 class="main-title">{title}</h1>
+{body}
+</body></html>
+"""
+
+
+class FixtureSite:
+    """
+    Handlers and the simulated behaviour of the site
+    """
+
+    def __init__(self, config: ServerConfig) -> None:
+        self.config = config
+        self.stats = ServerStats()
+
+        self.templates = [
+            file.read_bytes() for file in sorted(Path(config.fixtures).glob("*.html"))
+        ]
+        if not self.templates:
+            raise FileNotFoundError(f"No product pages in {config.fixtures}")
+
+        self.etags = [
+            f'"{hashlib.blake2b(page, digest_size=8).hexdigest()}"'
+            for page in self.templates
+        ]
+
+        # Token bucket of the whole site
+        self._tokens = config.rate
+        self._updated = time.monotonic()
+
+    def _throttled(self) -> bool:
+        if not self.config.rate:
+            return False
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.config.rate, self._tokens + (now - self._updated) * self.config.rate
+        )
+        self._updated = now
+
+        if self._tokens < 1:
+            return True
+
+        self._tokens -= 1
+        return False
+
+    @web.middleware
+    async def behaviour(self, request: web.Request, handler) -> web.StreamResponse:
+        """
+        Latency, throttling, errors and the counters of every response
+        """
+        if request.path == "/__stats":
+            return await handler(request)
+
+        config = self.config
+        delay = random.gauss(config.latency, config.latency_jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+        if self._throttled():
+            response = web.Response(
+                status=429, headers={"Retry-After": str(RETRY_AFTER)}
+            )
+        elif random.random() < config.error_rate:
+            response = web.Response(status=500, text="Internal Server Error")
+        else:
+            try:
+                response = await handler(request)
+            except web.HTTPException as e:
+                response = e
+
+        route = request.match_info.route.name or "other"
+        self.stats.routes[route] += 1
+        self.stats.statuses[response.status] += 1
+
+        return response
+
+    def listing(self, title: str, page: int, first_id: int, next_page: str) -> str:
+        start = first_id + (page - 1) * self.config.page_size
+        end = min(start + self.config.page_size, self.config.products + 1)
+
+        return render_page(
+            title,
+            render_tiles(range(start, end)),
+            next_page if end <= self.config.products else None,
+        )
+
+    async def home(self, request: web.Request) -> web.Response:
+        body = (
+            f'<a href="/ukr/category/{CATEGORY_SLUG}/">Мобільні телефони</a>\n'
+            + render_tiles(
+                range(1, min(self.config.page_size, self.config.products) + 1)
+            )
+        )
+        return web.Response(text=render_page("Brain", body), content_type="text/html")
+
+    async def search(self, request: web.Request) -> web.Response:
+        query = request.query.get("Search", "")
+        page = int(request.query.get("page", 1))
+
+        # Every query has its own stable results
+        first_id = 1 + int(hashlib.md5(query.encode()).hexdigest(), 16) % max(
+            1, self.config.products - self.config.page_size
+        )
+        next_page = f"/search/?Search={quote(query)}&page={page + 1}"
+
+        html = self.listing(f"Пошук: {query}", page, first_id, next_page)
+        return web.Response(text=html, content_type="text/html")
+
+    async def category(self, request: web.Request) -> web.Response:
+        slug = request.match_info["slug"]
+        page = int(request.match_info.get("page") or 1)
+        next_page = f"/ukr/category/{slug}/page={page + 1}/"
+
+        html = self.listing("Мобільні телефони", page, 1, next_page)
+        return web.Response(text=html, content_type="text/html")
+
+    async def product(self, request: web.Request) -> web.Response:
+        product_id = int(request.match_info["id"])
+        if not 1 <= product_id <= self.config.products:
+            raise web.HTTPNotFound()
+
+        index = product_id % len(self.templates)
+        headers = {}
+
+        if self.config.etag:
+            etag = self.etags[index]
+            headers["ETag"] = etag
+
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers=headers)
+
+        return web.Response(
+            body=self.templates[index],
+            headers=headers,
+            content_type="text/html",
+            charset="utf-8",
+        )
+
+    async def sitemap(self, request: web.Request) -> web.Response:
+        base = f"{request.scheme}://{request.host}"
+        urls = "".join(
+            f"<url><loc>{base}{product_link(i)}</loc></url>"
+            for i in range(1, self.config.products + 1)
+        )
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+        )
+
+        return web.Response(text=xml, content_type="application/xml")
+
+    async def stats_view(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.as_dict())
+
+
+def create_app(config: ServerConfig) -> web.Application:
+    site = FixtureSite(config)
+
+    app = web.Application(middlewares=[site.behaviour])
+    app["site"] = site
+    app.router.add_get("/", site.home, name="home")
+    app.router.add_get("/search/", site.search, name="search")
+    app.router.add_get("/ukr/category/{slug}/", site.category, name="category")
+    app.router.add_get(
+        "/ukr/category/{slug}/page={page:\\d+}/", site.category, name="category_page"
+    )
+    app.router.add_get(r"/ukr/{slug}-p{id:\d+}.html", site.product, name="product")
+    app.router.add_get("/sitemap.xml", site.sitemap, name="sitemap")
+    app.router.add_get("/__stats", site.stats_view, name="stats")
+
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local stand-in of brain.com.ua")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=FIXTURES_DIR,
+        help="Directory with the saved product pages (*.html)",
+    )
+    parser.add_argument(
+        "--products", type=int, default=PRODUCTS, help="Products of the site"
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=PAGE_SIZE, help="Tiles of one listing page"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=LATENCY, help="Mean response delay, seconds"
+    )
+    parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=LATENCY_JITTER,
+        help="Random deviation of the delay, seconds",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=ERROR_RATE,
+        help="Share of the responses with the status 500",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=RATE,
+        help="Max requests per second, the rest get 429 (0 - no limit)",
+    )
+    parser.add_argument(
+        "--etag",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="ETag / If-None-Match (304) of the product pages",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    config = ServerConfig(
+        fixtures=args.fixtures,
+        products=args.products,
+        page_size=args.page_size,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        rate=args.rate,
+        etag=args.etag,
+    )
+
+    print(f"🧪 Fixture site on http://{args.host}:{args.port}/")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
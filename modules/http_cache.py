@@ -0,0 +1,65 @@
+"""
+HTTP conditional-request cache for the re-scrapes.
+
+The validators of the last fetched page (ETag, Last-Modified) are stored
+on the ProductInfo row and sent back as If-None-Match / If-Modified-Since.
+When the server doesn't send validators, the SHA-256 of the body is compared
+with the stored one, so an unchanged page is never parsed or saved again.
+"""
+
+import hashlib
+
+from parser_app.models import ProductInfo
+
+# Status code of the unchanged page
+NOT_MODIFIED = 304
+
+
+def conditional_headers(product: ProductInfo) -> dict:
+    """
+    Request headers with the stored validators of the product page
+    """
+    headers = {}
+
+    if product.etag:
+        headers["If-None-Match"] = product.etag
+
+    if product.last_modified:
+        headers["If-Modified-Since"] = product.last_modified
+
+    return headers
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def is_unchanged(product: ProductInfo, status: int, content: bytes) -> bool:
+    """
+    Check if the page is the same as the last time
+    :param product:
+    :param status: HTTP status code of the response
+    :param content: body of the response
+    :return:
+    """
+    if status == NOT_MODIFIED:
+        return True
+
+    # Nothing is stored yet
+    if not product.content_hash:
+        return False
+
+    return product.content_hash == content_hash(content)
+
+
+def remember_validators(product: ProductInfo, headers, content: bytes) -> None:
+    """
+    Store the validators of the response on the product (saved with the parsed data)
+    :param product:
+    :param headers: headers of the response
+    :param content: body of the response
+    :return:
+    """
+    product.etag = headers.get("ETag")
+    product.last_modified = headers.get("Last-Modified")
+    product.content_hash = content_hash(content)
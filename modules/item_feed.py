@@ -0,0 +1,54 @@
+"""
+Feeding of the queue items to the worker pools.
+
+The items usually come from the DB (a lazy queryset, the claim generator),
+so reading them can block and can fail. feed() stops the workers even when the
+items fail, and aiter_in_thread() reads the items in one separate thread,
+so the event loop of the async pools isn't blocked by the DB.
+"""
+
+import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Iterable
+
+# End of the items
+_END = object()
+
+
+def feed(items: Iterable[Any], jobs: queue.Queue, end: Any, workers: int) -> None:
+    """
+    Put the items to the queue, then the end marker for every worker.
+    The end markers are put even when the items fail (e.g. the DB claim),
+    so the workers always stop and can be joined.
+    :param items: queue items, e.g. ProductInfo instances
+    :param jobs: queue of the workers (bounded, so the items are read on demand)
+    :param end: end marker of the workers
+    :param workers: number of the workers
+    :return:
+    """
+    try:
+        for item in items:
+            jobs.put(item)
+    finally:
+        for _ in range(workers):
+            jobs.put(end)
+
+
+async def aiter_in_thread(items: Iterable[Any]) -> AsyncIterator[Any]:
+    """
+    Iterate the items in one separate thread (the same one for every item,
+    so a DB generator keeps its connection), not in the event loop
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(items)
+    reader = ThreadPoolExecutor(max_workers=1)
+
+    try:
+        while (
+            item := await loop.run_in_executor(reader, next, iterator, _END)
+        ) is not _END:
+            yield item
+    finally:
+        # The cancelled run doesn't wait for the item being read
+        reader.shutdown(wait=False)
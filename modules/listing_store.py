@@ -0,0 +1,148 @@
+"""
+Saving of the listing tiles (search results, category pages).
+
+A tile has the link, the name, the prices and the availability, so the daily
+price refresh doesn't need to open the product pages. The known products get
+only the prices and the availability (BulkWriter), the new links are inserted
+as the 'New' products (BulkCreator), and the known products are queued
+for the product page only when the characteristics are missing or stale.
+"""
+
+from datetime import timedelta
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
+
+from db_writer import BulkCreator, BulkWriter
+from parser_app.models import ProductInfo, Status
+from parser_app.normalize import price_to_minor
+from price_tracker import PriceTracker
+
+# The product page is scraped again after this time
+DETAILS_MAX_AGE = timedelta(days=30)
+
+# Max pages of one listing (pagination)
+MAX_PAGES = 100
+
+# Fields updated from the tiles
+LISTING_FIELDS = [
+    "price_regular",
+    "price_sale",
+    "price_regular_minor",
+    "price_sale_minor",
+    "available",
+    "updated_at",
+]
+
+# Fields loaded to update the known products (characteristics are checked for NULL only)
+LOOKUP_FIELDS = ["id", "link", "status", "details_scraped_at"]
+
+
+def needs_details(product: ProductInfo, max_age: timedelta = DETAILS_MAX_AGE) -> bool:
+    """
+    Check the product page has to be scraped (the characteristics are missing or stale)
+    :param product: loaded with LOOKUP_FIELDS and the has_characteristics annotation
+    :param max_age:
+    :return:
+    """
+    return (
+        not product.has_characteristics
+        or product.details_scraped_at is None
+        or product.details_scraped_at < timezone.now() - max_age
+    )
+
+
+class ListingStore:
+    """
+    Write-behind saving of the listing tiles
+    """
+
+    def __init__(self, details_max_age: timedelta = DETAILS_MAX_AGE) -> None:
+        self.details_max_age = details_max_age
+
+        self.writer = BulkWriter(ProductInfo, LISTING_FIELDS)
+        self.creator = BulkCreator(ProductInfo)
+        self.price_tracker = PriceTracker(preload=False)
+
+        self.updated = 0
+        self.created = 0
+        self.queued = 0
+
+    def save_tiles(self, tiles: list[dict]) -> None:
+        """
+        Save the tiles of one listing page
+        :param tiles: dicts of EXTRACT_LISTING_JS
+        :return:
+        """
+        tiles = {tile["link"]: tile for tile in tiles if tile.get("link")}
+
+        # One query for the whole page (link is unique, so it's indexed)
+        products = (
+            ProductInfo.objects.only(*LOOKUP_FIELDS)
+            .annotate(
+                has_characteristics=ExpressionWrapper(
+                    Q(characteristics__isnull=False), output_field=BooleanField()
+                )
+            )
+            .in_bulk(list(tiles), field_name="link")
+        )
+
+        # Last prices of the known products by one query, not one per tile
+        self.price_tracker.load_history([product.id for product in products.values()])
+
+        stale = []
+        for link, tile in tiles.items():
+            price_regular_minor = price_to_minor(tile["price_regular"])
+            price_sale_minor = price_to_minor(tile["price_sale"])
+
+            product = products.get(link)
+            if product is None:
+                self.creator.add(
+                    ProductInfo(
+                        link=link,
+                        name=tile["name"],
+                        price_regular=tile["price_regular"],
+                        price_sale=tile["price_sale"],
+                        price_regular_minor=price_regular_minor,
+                        price_sale_minor=price_sale_minor,
+                        available=tile["available"],
+                        status=Status.NEW,
+                    )
+                )
+                self.created += 1
+                continue
+
+            product.price_regular = tile["price_regular"]
+            product.price_sale = tile["price_sale"]
+            product.price_regular_minor = price_regular_minor
+            product.price_sale_minor = price_sale_minor
+            product.available = tile["available"]
+            self.writer.add(product)
+            self.updated += 1
+
+            self.price_tracker.record(product.id, price_regular_minor, price_sale_minor)
+
+            if product.status == Status.DONE and needs_details(
+                product, self.details_max_age
+            ):
+                stale.append(product.id)
+
+        if stale:
+            # Only the done products, the claimed and the waiting ones are left alone
+            self.queued += ProductInfo.objects.filter(
+                id__in=stale, status=Status.DONE
+            ).update(status=Status.NEW, next_attempt_at=None, attempts=0)
+
+    def close(self) -> None:
+        """
+        Save the rest of the buffers
+        """
+        self.writer.close()
+        self.creator.close()
+        self.price_tracker.close()
+
+    def report(self) -> str:
+        return (
+            f"✅ Updated {self.updated} products, added {self.created}, "
+            f"queued {self.queued} for the product page"
+        )
@@ -8,6 +8,7 @@ sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "braincomua_project"))
 )
 
-os.environ["DJANGO_SETTINGS_MODULE"] = "braincomua_project.settings"
+# The scrapers can use the minimal profile: braincomua_project.settings_scraper
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "braincomua_project.settings")
 
 django.setup()
@@ -0,0 +1,212 @@
+"""
+End-to-end load test of the scrapers against the local fixture server.
+
+The test queues ITEMS products (or search queries for Selenium) of the fixture
+site in the DB, runs the scraper as a subprocess with BRAIN_BASE_URL pointed
+to the server, and reports the throughput including the DB writes:
+the products done / failed by the DB statuses, per second of the whole run,
+and the requests / statuses the server has answered.
+
+The rows of the fixture site (links of the server URL, "loadtest ..." queries)
+are deleted before every run. The scrapers claim all the 'New' products,
+so run it against a separate DB (DB_NAME).
+
+    python load_test.py http --start-server --items 500 --rate 0  # no rate limit
+    python load_test.py playwright --start-server --items 100 --contexts 4 --pages 4
+    python load_test.py selenium --start-server --items 50 --server-args "--error-rate 0.05"
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.error import URLError
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from load_django import *  # noqa
+from db_writer import BulkCreator
+from fixture_server import HOST, PORT, product_link
+from parser_app.models import ProductInfo, SearchQuery, Status
+
+MODULES_DIR = Path(__file__).resolve().parent
+
+SERVER_URL = f"http://{HOST}:{PORT}/"
+
+# Products (search queries) queued for one run
+ITEMS = 200
+
+# Prefix of the search queries of the fixture site
+QUERY_PREFIX = "loadtest"
+
+# Seconds to wait for the started server
+SERVER_TIMEOUT = 10
+
+# Scraper and its arguments per target
+# (the fixture pages aren't stored in the page archive of the real site)
+TARGETS = {
+    "http": ["2_get_info.py", "--no-archive"],
+    "selenium": ["3_get_info_selenium.py", "--batch"],
+    "playwright": ["4_get_info_playwright.py", "--pool"],
+}
+
+
+def server_stats(server_url: str) -> dict:
+    with urlopen(urljoin(server_url, "__stats"), timeout=5) as response:
+        return json.load(response)
+
+
+def wait_for_server(server_url: str, timeout: float = SERVER_TIMEOUT) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            server_stats(server_url)
+            return
+        except (URLError, ConnectionError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def start_server(server_url: str, server_args: list[str]) -> subprocess.Popen:
+    port = server_url.rstrip("/").rsplit(":", 1)[-1]
+    server = subprocess.Popen(
+        [sys.executable, "fixture_server.py", "--port", port, *server_args],
+        cwd=MODULES_DIR,
+    )
+
+    try:
+        wait_for_server(server_url)
+    except Exception:
+        server.terminate()
+        raise
+
+    return server
+
+
+def seed(target: str, server_url: str, items: int) -> None:
+    """
+    Replace the rows of the fixture site by ITEMS new products (or search queries)
+    """
+    ProductInfo.objects.filter(link__startswith=server_url).delete()
+    SearchQuery.objects.filter(query__startswith=QUERY_PREFIX).delete()
+
+    if target == "selenium":
+        SearchQuery.objects.bulk_create(
+            SearchQuery(query=f"{QUERY_PREFIX} {i}") for i in range(1, items + 1)
+        )
+        return
+
+    with BulkCreator(ProductInfo) as creator:
+        for i in range(1, items + 1):
+            creator.add(
+                ProductInfo(
+                    link=urljoin(server_url, product_link(i)), status=Status.NEW
+                )
+            )
+
+
+def count_statuses(target: str, server_url: str) -> dict[str, int]:
+    if target == "selenium":
+        rows = SearchQuery.objects.filter(query__startswith=QUERY_PREFIX)
+    else:
+        rows = ProductInfo.objects.filter(link__startswith=server_url)
+
+    return {
+        label: rows.filter(status=status).count() for status, label in Status.choices
+    }
+
+
+def run_target(target: str, server_url: str, target_args: list[str]) -> float:
+    """
+    Run the scraper against the server
+    :return: seconds of the run
+    """
+    env = {**os.environ, "BRAIN_BASE_URL": server_url}
+
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, *TARGETS[target], *target_args],
+        cwd=MODULES_DIR,
+        env=env,
+        check=False,
+    )
+
+    return time.perf_counter() - started
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load test of the scrapers against the local fixture server"
+    )
+    parser.add_argument("target", choices=list(TARGETS), help="Scraper to run")
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=ITEMS,
+        help="Products (search queries) queued for the run",
+    )
+    parser.add_argument(
+        "--server-url", default=SERVER_URL, help="URL of the fixture server"
+    )
+    parser.add_argument(
+        "--start-server",
+        action="store_true",
+        help="Start the fixture server for the run",
+    )
+    parser.add_argument(
+        "--server-args",
+        default="",
+        help='Arguments of the started server: "--latency 0.1 --rate 50"',
+    )
+
+    # The rest of the arguments go to the scraper
+    args, target_args = parser.parse_known_args()
+    args.target_args = [arg for arg in target_args if arg != "--"]
+
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    server_url = args.server_url.rstrip("/") + "/"
+
+    server = None
+    if args.start_server:
+        server = start_server(server_url, shlex.split(args.server_args))
+
+    try:
+        seed(args.target, server_url, args.items)
+        stats_before = server_stats(server_url)
+
+        print(f"🚀 {args.target}: {args.items} items against {server_url}")
+        elapsed = run_target(args.target, server_url, args.target_args)
+
+        stats = server_stats(server_url)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    statuses = count_statuses(args.target, server_url)
+    done = statuses[Status.DONE.label]
+    requests = stats["requests"] - stats_before["requests"]
+    responses = {
+        code: count - stats_before["statuses"].get(code, 0)
+        for code, count in stats["statuses"].items()
+    }
+
+    print(
+        f"⏱️ {elapsed:.1f} s | {done / elapsed:.2f} items/sec done | "
+        f"{requests / elapsed:.1f} requests/sec"
+    )
+    print("📊 DB: " + ", ".join(f"{k} {v}" for k, v in statuses.items()))
+    print("🌐 Server: " + ", ".join(f"{k}: {v}" for k, v in responses.items() if v))
+
+
+if __name__ == "__main__":
+    main()
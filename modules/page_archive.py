@@ -0,0 +1,161 @@
+"""
+Append-only compressed archive of the fetched pages.
+
+Every page is appended to the current segment file as a separate gzip member,
+so a page can be read back by its offset and length without decompressing
+the whole segment. The index is a JSON Lines file with one record per page:
+link, fetch time, segment, offset, length and encoding.
+A new segment is started when the current one reaches SEGMENT_SIZE bytes.
+Several scraper processes can append to the same segment: the segment is
+locked (flock) while the page is written, and the offset is its end then.
+
+The archive is used to re-run the extraction without the network.
+"""
+
+import fcntl
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+# Default archive location (the root of the repo)
+ARCHIVE_DIR = Path(__file__).resolve().parent.parent / "archive"
+
+# Max bytes in one segment file
+SEGMENT_SIZE = 256 * 1024 * 1024
+
+# gzip level, 6 is a good balance of the speed and the size for HTML
+COMPRESS_LEVEL = 6
+
+INDEX_FILE = "index.jsonl"
+
+
+class PageArchive:
+    """
+    Thread-safe writer / reader of the page archive
+    """
+
+    def __init__(self, path: str | Path = ARCHIVE_DIR) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_number = None
+
+    def _segment_path(self, number: int) -> Path:
+        return self.path / f"segment-{number:06d}.gz"
+
+    def _open_segment(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        if self._segment_number is None:
+            # Continue the last segment of the previous runs
+            numbers = [
+                int(file.stem.split("-")[1]) for file in self.path.glob("segment-*.gz")
+            ]
+            self._segment_number = max(numbers, default=1)
+        else:
+            self._segment_number += 1
+
+        self._segment = open(self._segment_path(self._segment_number), "ab")
+
+    def append(self, link: str, content: bytes, encoding: str = "utf-8") -> None:
+        """
+        Add the page to the archive
+        :param link: URL of the page
+        :param content: body of the response
+        :param encoding: encoding of the body
+        :return:
+        """
+        data = gzip.compress(content, compresslevel=COMPRESS_LEVEL)
+        fetched_at = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            while True:
+                if self._segment is None:
+                    self._open_segment()
+
+                # The other processes don't write until the page and its record are written
+                fcntl.flock(self._segment, fcntl.LOCK_EX)
+                offset = self._segment.seek(0, os.SEEK_END)
+                if offset < SEGMENT_SIZE:
+                    break
+
+                # Closing releases the lock
+                self.close()
+
+            try:
+                self._segment.write(data)
+                self._segment.flush()
+
+                record = {
+                    "link": link,
+                    "fetched_at": fetched_at,
+                    "segment": self._segment_number,
+                    "offset": offset,
+                    "length": len(data),
+                    "encoding": encoding,
+                }
+                with open(self.path / INDEX_FILE, "a", encoding="utf-8") as index:
+                    index.write(json.dumps(record, ensure_ascii=False) + "\n")
+            finally:
+                fcntl.flock(self._segment, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def index(self, latest_only: bool = True) -> list[dict]:
+        """
+        Records of the index, only the last fetch of every link by default
+        """
+        index_path = self.path / INDEX_FILE
+        if not index_path.exists():
+            return []
+
+        records = []
+        with open(index_path, encoding="utf-8") as index:
+            for line in index:
+                if line.strip():
+                    records.append(json.loads(line))
+
+        if latest_only:
+            latest = {}
+            for record in records:
+                if (
+                    record["link"] not in latest
+                    or record["fetched_at"] >= latest[record["link"]]["fetched_at"]
+                ):
+                    latest[record["link"]] = record
+            records = list(latest.values())
+
+        return records
+
+    def iter_pages(self, latest_only: bool = True) -> Iterator[tuple[dict, str]]:
+        """
+        Yield (index record, html) in the order of the segment files
+        """
+        records = sorted(
+            self.index(latest_only), key=lambda r: (r["segment"], r["offset"])
+        )
+
+        segment = None
+        segment_number = None
+        try:
+            for record in records:
+                if record["segment"] != segment_number:
+                    if segment is not None:
+                        segment.close()
+                    segment_number = record["segment"]
+                    segment = open(self._segment_path(segment_number), "rb")
+
+                segment.seek(record["offset"])
+                content = gzip.decompress(segment.read(record["length"]))
+
+                yield record, content.decode(record["encoding"], errors="replace")
+        finally:
+            if segment is not None:
+                segment.close()
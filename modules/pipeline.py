@@ -0,0 +1,148 @@
+"""
+Staged fetch / parse / save pipeline.
+
+    items -> fetcher threads -> bounded queue -> parse processes -> bounded queue -> DB writer
+
+Fetching is I/O bound and runs in the threads, parsing is CPU bound and runs
+in a ProcessPoolExecutor (so it isn't limited by the GIL), and all the results
+are saved by one writer thread. Every stage is sized independently and the
+bounded queues give the backpressure: a slow stage stops the previous one
+instead of piling up the pages in memory.
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable
+
+from item_feed import feed
+
+# Fetcher threads
+FETCHERS = 16
+
+# Parse processes
+PARSERS = os.cpu_count() or 1
+
+# Max items waiting between two stages
+QUEUE_SIZE = 100
+
+# End of the stream
+_DONE = object()
+
+
+def run(
+    items: Iterable[Any],
+    fetch: Callable[[Any], str | None],
+    parse: Callable[[str], dict],
+    save: Callable[[Any, dict], Any],
+    fetchers: int = FETCHERS,
+    parsers: int = PARSERS,
+    queue_size: int = QUEUE_SIZE,
+    on_error: Callable[[Any, Exception], Any] | None = None,
+) -> None:
+    """
+    Run the items through the pipeline
+    :param items: queue items, e.g. ProductInfo instances
+    :param fetch: returns the HTML of the item, None to skip the item (runs in a thread)
+    :param parse: returns the parsed data of the HTML (runs in a process, must be picklable)
+    :param save: saves the parsed data of the item (runs in the writer thread)
+    :param fetchers: fetcher threads
+    :param parsers: parse processes
+    :param queue_size: max items waiting between two stages
+    :param on_error: gets (item, error) of the failed fetch, parse or save
+    :return:
+    """
+    fetch_queue = queue.Queue(maxsize=queue_size)
+    parse_queue = queue.Queue(maxsize=queue_size)
+    save_queue = queue.Queue(maxsize=queue_size)
+
+    def fail(item: Any, error: Exception) -> None:
+        if not on_error:
+            return
+
+        try:
+            on_error(item, error)
+        except Exception as e:
+            print(f"❌ Error saving the failure of {item}: {e}")
+            # TO DO: logging
+
+    def fetch_worker() -> None:
+        while (item := fetch_queue.get()) is not _DONE:
+            try:
+                html = fetch(item)
+            except Exception as e:
+                print(f"❌ Error fetching {item}: {e}")
+                # TO DO: logging
+                fail(item, e)
+                continue
+
+            if html is not None:
+                parse_queue.put((item, html))
+
+    def put_result(item: Any, future) -> None:
+        try:
+            save_queue.put((item, future.result()))
+        except Exception as e:
+            print(f"❌ Error parsing {item}: {e}")
+            # TO DO: logging
+            fail(item, e)
+
+    def parse_dispatcher(executor: ProcessPoolExecutor) -> None:
+        # Max pages sent to the processes and not saved yet
+        max_pending = parsers * 2
+        pending = deque()
+
+        while (task := parse_queue.get()) is not _DONE:
+            if len(pending) >= max_pending:
+                put_result(*pending.popleft())
+
+            item, html = task
+            try:
+                future = executor.submit(parse, html)
+            except Exception as e:
+                # The pool is broken (a parse process died), the dispatcher keeps
+                # draining the queue, so the fetchers aren't blocked by the full one
+                print(f"❌ Error parsing {item}: {e}")
+                # TO DO: logging
+                fail(item, e)
+                continue
+
+            pending.append((item, future))
+
+        while pending:
+            put_result(*pending.popleft())
+
+        save_queue.put(_DONE)
+
+    def save_worker() -> None:
+        while (task := save_queue.get()) is not _DONE:
+            item, product_info = task
+            try:
+                save(item, product_info)
+            except Exception as e:
+                print(f"❌ Error saving {item}: {e}")
+                # TO DO: logging
+                fail(item, e)
+
+    with ProcessPoolExecutor(max_workers=parsers) as executor:
+        writer = threading.Thread(target=save_worker)
+        dispatcher = threading.Thread(target=parse_dispatcher, args=(executor,))
+        fetcher_threads = [
+            threading.Thread(target=fetch_worker) for _ in range(fetchers)
+        ]
+
+        for thread in [writer, dispatcher, *fetcher_threads]:
+            thread.start()
+
+        try:
+            feed(items, fetch_queue, _DONE, len(fetcher_threads))
+        finally:
+            # Stop the stages one by one, every stage finishes its queue first
+            for thread in fetcher_threads:
+                thread.join()
+
+            parse_queue.put(_DONE)
+            dispatcher.join()
+            writer.join()
@@ -0,0 +1,135 @@
+"""
+Pool of the Playwright browser contexts (async API).
+
+One browser is launched for the whole run and kept alive. It has CONTEXTS
+contexts with PAGES_PER_CONTEXT pages each, and every page is a worker, which
+takes the next item from the queue. A context is closed and replaced by a new
+one after MAX_ITEMS_PER_CONTEXT items to keep the browser memory in check.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable
+
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+
+from item_feed import aiter_in_thread
+
+# Browser contexts
+CONTEXTS = 4
+
+# Pages (workers) of one context
+PAGES_PER_CONTEXT = 4
+
+# Items handled by one context before it is replaced
+MAX_ITEMS_PER_CONTEXT = 500
+
+# End of the items
+_END = object()
+
+
+async def _context_worker(
+    browser: Browser,
+    queue: asyncio.Queue,
+    handler: Callable[[Page, Any], Awaitable[Any]],
+    pages_per_context: int,
+    context_options: dict,
+    on_context: Callable[[BrowserContext], Awaitable[Any]] | None,
+) -> None:
+    # Page workers, which got the end of the items
+    stopped = 0
+
+    while stopped < pages_per_context:
+        context = await browser.new_context(**context_options)
+        if on_context:
+            await on_context(context)
+        budget = [MAX_ITEMS_PER_CONTEXT]
+
+        async def page_worker() -> bool:
+            """
+            Returns True on the end of the items, False when the context is used up
+            """
+            page = await context.new_page()
+
+            while budget[0] > 0:
+                item = await queue.get()
+                try:
+                    if item is _END:
+                        return True
+
+                    budget[0] -= 1
+                    await handler(page, item)
+                except Exception as e:
+                    print(f"❌ Error handling {item}: {e}")
+                    # TO DO: logging
+                finally:
+                    queue.task_done()
+
+            return False
+
+        results = await asyncio.gather(
+            *(page_worker() for _ in range(pages_per_context - stopped))
+        )
+        stopped += sum(results)
+
+        await context.close()
+
+
+async def run(
+    items: Iterable[Any],
+    handler: Callable[[Page, Any], Awaitable[Any]],
+    contexts: int = CONTEXTS,
+    pages_per_context: int = PAGES_PER_CONTEXT,
+    headless: bool = True,
+    context_options: dict | None = None,
+    on_context: Callable[[BrowserContext], Awaitable[Any]] | None = None,
+) -> None:
+    """
+    Handle every item on a free page of the pool
+    :param items: queue items, e.g. ProductInfo instances
+    :param handler: coroutine, gets (page, item)
+    :param contexts: browser contexts
+    :param pages_per_context: pages (workers) of one context
+    :param headless: run the browser without the window
+    :param context_options: options of browser.new_context()
+    :param on_context: coroutine, gets every new context (e.g. to set the routes)
+    :return:
+    """
+    workers_count = contexts * pages_per_context
+    queue = asyncio.Queue(maxsize=workers_count * 2)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+
+        workers = [
+            asyncio.create_task(
+                _context_worker(
+                    browser,
+                    queue,
+                    handler,
+                    pages_per_context,
+                    context_options or {},
+                    on_context,
+                )
+            )
+            for _ in range(contexts)
+        ]
+
+        async def produce() -> None:
+            async for item in aiter_in_thread(items):
+                await queue.put(item)
+
+            for _ in range(workers_count):
+                await queue.put(_END)
+
+        tasks = [asyncio.create_task(produce()), *workers]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # The first error (the items, a context worker failed to open its
+            # context or pages) stops the rest, otherwise the producer would wait
+            # for the full queue or the workers for the items forever
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            await browser.close()
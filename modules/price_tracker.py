@@ -0,0 +1,140 @@
+"""
+Change-only writes of the price history.
+
+The last history prices of all the products are loaded in bulk at startup
+(one pass over PriceHistory), then every scraped price is compared
+in memory and a PriceHistory row is added only when the price has changed.
+The current prices of ProductInfo aren't used: they are also written
+without the history (new listing products, re-parsed archive pages).
+Without the preload, the last prices are read from PriceHistory by one query
+per batch of products (load_history) and cached.
+The rows are inserted by the BulkCreator in batches.
+"""
+
+import threading
+
+from db_writer import BulkCreator
+from parser_app.models import PriceHistory
+
+# Rows read by one round-trip while loading the last known prices
+LOAD_CHUNK_SIZE = 10000
+
+
+class PriceTracker:
+    """
+    In-memory cache of the last known prices, which writes only the changes
+    """
+
+    def __init__(self, preload: bool = True) -> None:
+        """
+        :param preload: load the prices of all the products,
+            otherwise the last price of a product is read from DB when it's first seen
+        """
+        self.preload = preload
+        self.creator = BulkCreator(PriceHistory)
+
+        # None - the product has no history yet
+        self._prices: dict[int, tuple[int | None, int | None] | None] = {}
+        self._lock = threading.Lock()
+
+        if preload:
+            self.load()
+
+    def __enter__(self) -> "PriceTracker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def load(self) -> None:
+        """
+        Load the last history prices of all the products
+        """
+        rows = (
+            PriceHistory.objects.order_by("product_id", "-recorded_at")
+            .distinct("product_id")
+            .values_list("product_id", "price_regular_minor", "price_sale_minor")
+            .iterator(chunk_size=LOAD_CHUNK_SIZE)
+        )
+
+        with self._lock:
+            for product_id, price_regular, price_sale in rows:
+                self._prices[product_id] = (price_regular, price_sale)
+
+    def load_history(self, product_ids: list[int]) -> None:
+        """
+        Load the last history prices of the products, which aren't cached yet (one query)
+        """
+        if self.preload:
+            return
+
+        with self._lock:
+            product_ids = [i for i in product_ids if i not in self._prices]
+        if not product_ids:
+            return
+
+        rows = (
+            PriceHistory.objects.filter(product_id__in=product_ids)
+            .order_by("product_id", "-recorded_at")
+            .distinct("product_id")
+            .values_list("product_id", "price_regular_minor", "price_sale_minor")
+        )
+        prices = dict.fromkeys(product_ids)
+        for product_id, price_regular, price_sale in rows:
+            prices[product_id] = (price_regular, price_sale)
+
+        with self._lock:
+            for product_id, price in prices.items():
+                self._prices.setdefault(product_id, price)
+
+    def _last_price(self, product_id: int) -> tuple[int | None, int | None] | None:
+        if product_id in self._prices or self.preload:
+            return self._prices.get(product_id)
+
+        # Not loaded by load_history(), cached, so it's read only once
+        self._prices[product_id] = (
+            PriceHistory.objects.filter(product_id=product_id)
+            .order_by("-recorded_at")
+            .values_list("price_regular_minor", "price_sale_minor")
+            .first()
+        )
+
+        return self._prices[product_id]
+
+    def record(
+        self, product_id: int, price_regular: int | None, price_sale: int | None
+    ) -> bool:
+        """
+        Add the history row if the price of the product has changed
+        :param product_id:
+        :param price_regular: regular price in the minor units
+        :param price_sale: sale price in the minor units
+        :return: True if the price has changed
+        """
+        price = (price_regular, price_sale)
+
+        # A page without the prices (e.g. a parsing error) isn't a price change
+        if price == (None, None):
+            return False
+
+        with self._lock:
+            if self._last_price(product_id) == price:
+                return False
+
+            self._prices[product_id] = price
+
+        self.creator.add(
+            PriceHistory(
+                product_id=product_id,
+                price_regular_minor=price_regular,
+                price_sale_minor=price_sale,
+            )
+        )
+
+        return True
+
+    def close(self) -> None:
+        """
+        Save the rest of the history rows
+        """
+        self.creator.close()
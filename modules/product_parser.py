@@ -0,0 +1,325 @@
+"""
+Extraction of the product data from a brain.com.ua product page.
+
+The logic doesn't touch the network or the DB, so it can be shared
+by the Requests / BS4 scraper and the asyncio engine.
+
+There are two backends with the same result:
+- "bs4" - BeautifulSoup with html.parser (the original one)
+- "lxml" - lxml with the XPath expressions compiled once, at import time
+"""
+
+from typing import Callable
+
+import lxml.html
+from bs4 import BeautifulSoup
+from lxml import etree
+
+
+def _has_class(name: str) -> str:
+    """
+    XPath condition for the class token (the same as the CSS .name selector)
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled XPath expressions (the CSS selectors of the bs4 backend in the comments)
+NAME_XPATH = etree.XPath(f"//h1[{_has_class('main-title')}]")  # h1.main-title
+COLOR_XPATH = etree.XPath("//a[starts-with(@title, 'Колір')]")  # a[title^='Колір']
+BUILTIN_MEMORY_XPATH = etree.XPath(
+    "//a[starts-with(@title, 'Вбудована пам')]"
+)  # a[title^='Вбудована пам']
+MANUFACTURER_XPATH = etree.XPath(
+    "(//text()[. = 'Виробник'])[1]/following::span[1]"
+)  # find(string="Виробник").find_next("span")
+PRICES_XPATH = etree.XPath(
+    f"//*[{_has_class('main-price-block')}]//*[{_has_class('price-wrapper')}]/span"
+)  # .main-price-block .price-wrapper > span
+SKU_XPATH = etree.XPath(f"//*[{_has_class('br-pr-code-val')}]")  # .br-pr-code-val
+REVIEWS_COUNT_XPATH = etree.XPath(
+    f"//*[{_has_class('reviews-count')}]//span"
+)  # .reviews-count span
+IMAGES_XPATH = etree.XPath(
+    f"//*[{_has_class('br-pr-slider')}]//*[{_has_class('br-main-img')}]"
+)  # .br-pr-slider .br-main-img
+CHARACTERISTICS_XPATH = etree.XPath(f"//*[{_has_class('br-pr-chr-item')}]")
+CHARACTERISTIC_TITLE_XPATH = etree.XPath(".//h3")
+CHARACTERISTIC_ITEMS_XPATH = etree.XPath(".//div[parent::div]")  # div > div
+CHARACTERISTIC_COLS_XPATH = etree.XPath(".//span")
+TEXT_XPATH = etree.XPath("string()")  # the same as the .text of bs4
+
+
+def parse_product_html(html: str) -> dict:
+    """
+    Parse product data from the HTML of the product page
+    :param html:
+    :return:
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Product Data
+    product_info = {}
+
+    # Name
+    try:
+        product_info["name"] = soup.select_one(
+            "h1.main-title"
+        ).text.strip()  # //h1[@class='main-title']
+    except AttributeError as e:
+        print("❌ Error Name", e)
+        product_info["name"] = None
+        # TO DO: logging
+
+    # Color
+    try:
+        product_info["color"] = soup.select_one(
+            "a[title^='Колір']"
+        ).text.strip()  # //a[starts-with(@title, 'Колір')]
+    except AttributeError as e:
+        print("❌ Error Color", e)
+        product_info["color"] = None
+        # TO DO: logging
+
+    # Built-in Memory
+    try:
+        product_info["builtin_memory"] = soup.select_one(
+            "a[title^='Вбудована пам']"
+        ).text.strip()  # //a[starts-with(@title, 'Вбудована пам')]
+    except AttributeError as e:
+        print("❌ Error Built-in Memory", e)
+        product_info["builtin_memory"] = None
+        # TO DO: logging
+
+    # Manufacturer
+    try:
+        product_info["manufacturer"] = (
+            soup.find(string="Виробник").find_next("span").text.strip()
+        )
+        # //span[text()='Виробник']/following-sibling::span
+    except AttributeError as e:
+        print("❌ Error Manufacturer", e)
+        product_info["manufacturer"] = None
+        # TO DO: logging
+
+    # Prices
+    try:
+        prices = soup.select(
+            ".main-price-block .price-wrapper > span"
+        )  # //*[contains(@class, 'main-price-block')]//*[@class='price-wrapper']/span
+    except AttributeError as e:
+        print("❌ Error Prices", e)
+        product_info["price_regular"] = None
+        product_info["price_sale"] = None
+        # TO DO: logging
+    else:
+        # Regular Price
+        try:
+            product_info["price_regular"] = prices[0].text.strip()
+        except IndexError:
+            product_info["price_regular"] = None
+            # TO DO: logging
+
+        # Sale Price
+        try:
+            product_info["price_sale"] = prices[1].text.strip()
+        except IndexError:
+            product_info["price_sale"] = None
+            # TO DO: logging
+
+    # SKU
+    try:
+        sku = soup.select_one(".br-pr-code-val")
+
+        product_info["sku"] = sku.text.strip()
+        # //*[@class='br-pr-code-val']
+    except AttributeError as e:
+        print("❌ Error SKU", e)
+        product_info["sku"] = None
+        # TO DO: logging
+
+    # Reviews Count
+    try:
+        product_info["reviews_count"] = soup.select_one(
+            ".reviews-count span"
+        ).text.strip()
+        # //*[contains(@class, 'reviews-count')]/span
+    except AttributeError as e:
+        print("❌ Error Review Count", e)
+        product_info["reviews_count"] = None
+        # TO DO: logging
+
+    # Images
+    try:
+        images = soup.select(".br-pr-slider .br-main-img")
+        # //*[contains(@class, 'br-pr-slider')]//img[@class='br-main-img']
+
+        images_srcs = []
+        for image in images:
+            images_srcs.append(image.get("src"))
+
+        product_info["images"] = images_srcs
+    except AttributeError as e:
+        print("❌ Error Images", e)
+        product_info["images"] = None
+        # TO DO: logging
+
+    # Characteristics
+    try:
+        characteristics = soup.select(".br-pr-chr-item")
+        # //*[@class='br-pr-chr-item']
+
+        characteristics_list = []
+        for characteristic in characteristics:
+            try:
+                title = characteristic.select_one("h3").text.strip()
+
+                items = characteristic.select("div > div")
+            except AttributeError:
+                # TO DO: logging
+                continue
+            else:
+                items_dict = {}
+                for item in items:
+                    try:
+                        key, value, *rest = item.select("span")
+                    except AttributeError:
+                        # TO DO: logging
+                        continue
+                    else:
+                        # Default parameter
+                        param_name = None
+                        param_value = None
+
+                        try:
+                            param_name = key.text.strip()
+                            param_value = value.text.replace("\xa0", " ").strip()
+                        except AttributeError:
+                            # TO DO: logging
+                            continue
+                        else:
+                            items_dict[param_name] = param_value
+                        finally:
+                            # Screen Diagonal
+                            if param_name == "Діагональ екрану":
+                                product_info["screen_diagonal"] = param_value
+
+                            # Screen Resolution
+                            if param_name == "Роздільна здатність екрану":
+                                product_info["screen_resolution"] = param_value
+
+                # Append characteristic list
+                characteristics_list.append((title, items_dict))
+
+        product_info["characteristics"] = characteristics_list
+    except AttributeError:
+        product_info["characteristics"] = None
+        # TO DO: logging
+
+    return product_info
+
+
+def _text(element) -> str:
+    return TEXT_XPATH(element).strip()
+
+
+def parse_product_html_lxml(html: str) -> dict:
+    """
+    Parse product data from the HTML of the product page by lxml
+    :param html:
+    :return:
+    """
+    try:
+        tree = lxml.html.document_fromstring(html)
+    except etree.ParserError:
+        # Empty document (e.g. an empty body), every field is missing like in bs4
+        tree = lxml.html.document_fromstring("<html></html>")
+
+    # Product Data
+    product_info = {}
+
+    def save_text_value(attrib: str, label: str, xpath: etree.XPath) -> None:
+        try:
+            product_info[attrib] = _text(xpath(tree)[0])
+        except IndexError as e:
+            print(f"❌ Error {label}", e)
+            product_info[attrib] = None
+            # TO DO: logging
+
+    # Name
+    save_text_value("name", "Name", NAME_XPATH)
+
+    # Color
+    save_text_value("color", "Color", COLOR_XPATH)
+
+    # Built-in Memory
+    save_text_value("builtin_memory", "Built-in Memory", BUILTIN_MEMORY_XPATH)
+
+    # Manufacturer
+    save_text_value("manufacturer", "Manufacturer", MANUFACTURER_XPATH)
+
+    # Prices
+    prices = PRICES_XPATH(tree)
+
+    # Regular Price
+    try:
+        product_info["price_regular"] = _text(prices[0])
+    except IndexError:
+        product_info["price_regular"] = None
+        # TO DO: logging
+
+    # Sale Price
+    try:
+        product_info["price_sale"] = _text(prices[1])
+    except IndexError:
+        product_info["price_sale"] = None
+        # TO DO: logging
+
+    # SKU
+    save_text_value("sku", "SKU", SKU_XPATH)
+
+    # Reviews Count
+    save_text_value("reviews_count", "Review Count", REVIEWS_COUNT_XPATH)
+
+    # Images
+    product_info["images"] = [image.get("src") for image in IMAGES_XPATH(tree)]
+
+    # Characteristics
+    characteristics_list = []
+    for characteristic in CHARACTERISTICS_XPATH(tree):
+        titles = CHARACTERISTIC_TITLE_XPATH(characteristic)
+        if not titles:
+            # TO DO: logging
+            continue
+
+        title = _text(titles[0])
+
+        items_dict = {}
+        for item in CHARACTERISTIC_ITEMS_XPATH(characteristic):
+            key, value, *rest = CHARACTERISTIC_COLS_XPATH(item)
+
+            param_name = _text(key)
+            param_value = TEXT_XPATH(value).replace("\xa0", " ").strip()
+
+            items_dict[param_name] = param_value
+
+            # Screen Diagonal
+            if param_name == "Діагональ екрану":
+                product_info["screen_diagonal"] = param_value
+
+            # Screen Resolution
+            if param_name == "Роздільна здатність екрану":
+                product_info["screen_resolution"] = param_value
+
+        # Append characteristic list
+        characteristics_list.append((title, items_dict))
+
+    product_info["characteristics"] = characteristics_list
+
+    return product_info
+
+
+# Extraction backends by name
+PARSERS: dict[str, Callable[[str], dict]] = {
+    "bs4": parse_product_html,
+    "lxml": parse_product_html_lxml,
+}
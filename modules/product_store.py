@@ -0,0 +1,207 @@
+"""
+Saving of the scraped products shared by all the scrapers.
+
+The products are claimed from the DB queue with the QUEUE_FIELDS only,
+and the results are saved by the write-behind buffers:
+the parsed data by one BulkWriter, the status / retries by another one.
+The re-parsed archive pages only update the parsed data (save_parsed).
+The price changes are recorded by the PriceTracker.
+"""
+
+import threading
+from typing import Iterator
+
+from django.db import OperationalError, close_old_connections
+from django.utils import timezone
+
+from db_writer import BulkWriter
+from parser_app.models import ProductInfo
+from parser_app.normalize import normalize_product_info
+from price_tracker import PriceTracker
+
+# Products reserved by one claim
+CLAIM_SIZE = 100
+
+# Fields set by the parser (the missing ones are saved as NULL)
+PARSED_FIELDS = [
+    "name",
+    "color",
+    "builtin_memory",
+    "manufacturer",
+    "price_regular",
+    "price_sale",
+    "price_regular_minor",
+    "price_sale_minor",
+    "sku",
+    "reviews_count",
+    "images",
+    "screen_diagonal",
+    "screen_resolution",
+    "characteristics",
+    "specs",
+]
+
+# Fields saved after the failed fetch or when there is nothing to parse
+RETRY_FIELDS = [
+    "status",
+    "lease_expires_at",
+    "attempts",
+    "next_attempt_at",
+    "last_error",
+]
+
+# Fields saved after parsing (the rest of the row isn't rewritten)
+UPDATE_FIELDS = (
+    PARSED_FIELDS
+    + ["etag", "last_modified", "content_hash"]
+    + RETRY_FIELDS
+    + ["details_scraped_at", "updated_at"]
+)
+
+# Fields saved after re-parsing an archived page (the queue state isn't touched)
+REPARSE_FIELDS = PARSED_FIELDS + ["updated_at"]
+
+# Seconds to wait for the new products when the queue is empty (worker mode)
+IDLE_SLEEP = 5.0
+
+# Fields loaded for the queue, the big ones (characteristics, images) are never read
+QUEUE_FIELDS = ["id", "link", "etag", "last_modified", "content_hash", "attempts"]
+
+# The retry won't help
+PERMANENT_ERROR_STATUSES = (404, 410)
+
+
+def claim_products(size: int = CLAIM_SIZE) -> Iterator[ProductInfo]:
+    """
+    Claim the batches of products until the queue is empty.
+    The next batch is claimed only when the previous one is taken,
+    so the other scrapers get the rest of the queue.
+    """
+    while batch := ProductInfo.objects.claim(size, fields=QUEUE_FIELDS):
+        yield from batch
+
+
+def claim_forever(
+    size: int = CLAIM_SIZE,
+    idle_sleep: float = IDLE_SLEEP,
+    stop: threading.Event | None = None,
+) -> Iterator[ProductInfo]:
+    """
+    Claim the batches of products until the stop is set (long-running worker),
+    the empty queue is polled every idle_sleep seconds
+    """
+    stop = stop or threading.Event()
+
+    while not stop.is_set():
+        # The persistent connection is checked (CONN_HEALTH_CHECKS) and reopened
+        # if it's broken, e.g. after a restart of the DB
+        close_old_connections()
+
+        try:
+            batch = ProductInfo.objects.claim(size, fields=QUEUE_FIELDS)
+        except OperationalError as e:
+            print(f"❌ Error claiming the products: {e}")
+            # TO DO: logging
+            stop.wait(idle_sleep)
+            continue
+
+        if batch:
+            yield from batch
+        else:
+            stop.wait(idle_sleep)
+
+
+class ProductStore:
+    """
+    Write-behind saving of the scraped products
+    """
+
+    def __init__(self) -> None:
+        # Parsed products are saved in batches
+        self.writer = BulkWriter(ProductInfo, UPDATE_FIELDS)
+
+        # Unchanged and failed products only get the status and the retries
+        self.status_writer = BulkWriter(ProductInfo, RETRY_FIELDS)
+
+        # Re-parsed archive pages only get the parsed data
+        self.parsed_writer = BulkWriter(ProductInfo, REPARSE_FIELDS)
+
+        # Price history (change-only), see track_prices()
+        self.price_tracker: PriceTracker | None = None
+
+    def track_prices(self, preload: bool = True) -> None:
+        """
+        Record the price changes (loads the last known prices, so it isn't done on import)
+        """
+        self.price_tracker = PriceTracker(preload=preload)
+
+    def save(self, parsed_data: ProductInfo, product_info: dict) -> None:
+        """
+        Save parsed product data into DB (by the write-behind buffer)
+        :param parsed_data:
+        :param product_info:
+        :return:
+        """
+        self._set_parsed(parsed_data, product_info)
+
+        if self.price_tracker is not None:
+            self.price_tracker.record(
+                parsed_data.id,
+                product_info["price_regular_minor"],
+                product_info["price_sale_minor"],
+            )
+
+        parsed_data.mark_done()
+        parsed_data.details_scraped_at = timezone.now()
+
+        self.writer.add(parsed_data)
+
+    def save_parsed(self, parsed_data: ProductInfo, product_info: dict) -> None:
+        """
+        Save the data of the re-parsed archived page: the status, the retries,
+        details_scraped_at and the price history are left as they are
+        (the page isn't a new scrape)
+        """
+        self._set_parsed(parsed_data, product_info)
+        self.parsed_writer.add(parsed_data)
+
+    @staticmethod
+    def _set_parsed(parsed_data: ProductInfo, product_info: dict) -> None:
+        normalize_product_info(product_info)
+
+        # Every field is set, so bulk_update doesn't load the deferred ones
+        for key in PARSED_FIELDS:
+            setattr(parsed_data, key, product_info.get(key))
+
+    def mark_unchanged(self, parsed_data: ProductInfo) -> None:
+        """
+        Nothing to parse, the stored data is up to date
+        """
+        parsed_data.mark_done()
+        self.status_writer.add(parsed_data)
+
+    def save_failed_attempt(
+        self, parsed_data: ProductInfo, error: str, status: int | None = None
+    ) -> None:
+        """
+        Schedule the retry of the product (or set the status 'Failed')
+        :param parsed_data:
+        :param error: error message
+        :param status: HTTP status code of the response, if there was one
+        :return:
+        """
+        parsed_data.mark_failed_attempt(
+            error, permanent=status in PERMANENT_ERROR_STATUSES
+        )
+        self.status_writer.add(parsed_data)
+
+    def close(self) -> None:
+        """
+        Save the rest of the buffers
+        """
+        self.writer.close()
+        self.status_writer.close()
+        self.parsed_writer.close()
+
+        if self.price_tracker is not None:
+            self.price_tracker.close()
@@ -0,0 +1,170 @@
+"""
+Shared per-host token bucket rate limiter.
+
+Every host has its own bucket with RATE requests per second and BURST requests
+without waiting. A request reserves a token and gets the delay it has to wait
+before it's sent, so the threads and the coroutines of one process share
+the same limit. When the site returns 429/503 the rate of the host is halved
+and its schedule is moved past Retry-After (the waiting requests don't fire
+at once when it ends), then the rate slowly recovers on the successful responses.
+The rate 0 means no limit.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Requests per second for one host (0 - no limit)
+RATE = 2.0
+
+# Requests, which can be sent without waiting
+BURST = 5
+
+# Max random seconds added to every delay
+JITTER = 0.5
+
+# The rate is never lowered below this value
+MIN_RATE = 0.1
+
+# The rate is multiplied by this value on 429/503
+BACKOFF_FACTOR = 0.5
+
+# Requests per second added to the rate after every successful response
+RECOVERY_STEP = 0.05
+
+# Status codes, which mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        # Time of the tokens, it's in the future while the host is blocked
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+
+class HostRateLimiter:
+    """
+    Token bucket rate limiter keyed by host
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE,
+        burst: int = BURST,
+        jitter: float = JITTER,
+        min_rate: float = MIN_RATE,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.min_rate = min_rate
+
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> _Bucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(self.rate, self.burst)
+
+        return self._buckets[host]
+
+    def reserve(self, url: str) -> float:
+        """
+        Take a token of the host, returns the seconds to wait before the request
+        """
+        if not self.rate:
+            return random.uniform(0, self.jitter) if self.jitter else 0.0
+
+        with self._lock:
+            bucket = self._bucket(url)
+            now = time.monotonic()
+            bucket.refill(now)
+
+            # The negative tokens are the requests already waiting for the host,
+            # they are spaced by the rate from the end of the block
+            bucket.tokens -= 1
+            delay = bucket.updated - now
+            if bucket.tokens < 0:
+                delay += -bucket.tokens / bucket.rate
+
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+
+        return delay
+
+    def wait(self, url: str) -> None:
+        """
+        Wait for the token (threads)
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str) -> None:
+        """
+        Wait for the token without blocking the event loop
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def feedback(self, url: str, status: int, retry_after: str | None = None) -> None:
+        """
+        Adjust the rate of the host by the response status
+        :param url:
+        :param status: HTTP status code of the response
+        :param retry_after: value of the Retry-After header
+        :return:
+        """
+        if not self.rate:
+            return
+
+        with self._lock:
+            bucket = self._bucket(url)
+
+            if status in THROTTLE_STATUSES:
+                now = time.monotonic()
+                bucket.refill(now)
+                bucket.rate = max(self.min_rate, bucket.rate * BACKOFF_FACTOR)
+
+                # Don't send anything to the host until Retry-After passes:
+                # the next requests start then, one by one (no burst)
+                pause = _parse_retry_after(retry_after)
+                if pause is None:
+                    pause = 1 / bucket.rate
+                bucket.updated = max(bucket.updated, now + pause)
+                bucket.tokens = 1.0
+            elif status < 400 and bucket.rate < self.rate:
+                bucket.rate = min(self.rate, bucket.rate + RECOVERY_STEP)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """
+    Retry-After is either the seconds or the HTTP date
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
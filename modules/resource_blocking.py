@@ -0,0 +1,215 @@
+"""
+Blocking of the heavy resources in the browser scrapers.
+
+The product data is read from the DOM text and the image src attributes,
+so the images, the fonts, the styles, the media, the analytics and the ads
+aren't needed (the styles are kept in the click-driven search flows).
+Playwright aborts them by page.route / context.route (by the resource type
+and the domain), Selenium (Chrome) blocks them by the DevTools Protocol
+Network.setBlockedURLs (by the URL patterns).
+
+The blocked requests are counted by the resource type and the domain,
+the loaded ones by the bytes. A blocked request is never sent, so its
+size is unknown: the saving is seen as the fall of the loaded bytes.
+"""
+
+import json
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Playwright resource types, which are aborted
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet")
+
+# The click-driven flows (search form -> results -> product) keep the styles:
+# the layout and the visibility decide whether click() succeeds
+INTERACTIVE_RESOURCE_TYPES = ("image", "media", "font")
+
+# Analytics, ads and widgets (the subdomains are blocked too)
+BLOCKED_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "criteo.net",
+    "tiktok.com",
+    "bing.com",
+    "esputnik.com",
+    "binotel.com",
+)
+
+# URL patterns of the resource types for Network.setBlockedURLs (Selenium),
+# CDP can't block by the type, only by the URL
+RESOURCE_TYPE_PATTERNS = {
+    "image": (
+        "*.jpg*",
+        "*.jpeg*",
+        "*.png*",
+        "*.gif*",
+        "*.webp*",
+        "*.avif*",
+        "*.svg*",
+        "*.ico*",
+    ),
+    "media": ("*.mp4*", "*.webm*", "*.mp3*", "*.ogg*"),
+    "font": ("*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"),
+    "stylesheet": ("*.css*",),
+}
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+class ResourceBlocker:
+    """
+    Decides, which requests are blocked, and counts them
+    """
+
+    def __init__(
+        self,
+        resource_types: tuple[str, ...] = BLOCKED_RESOURCE_TYPES,
+        domains: tuple[str, ...] = BLOCKED_DOMAINS,
+    ) -> None:
+        self.resource_types = frozenset(resource_types)
+        self.domains = tuple(domains)
+
+        self.blocked_types: Counter[str] = Counter()
+        self.blocked_domains: Counter[str] = Counter()
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+        self._lock = threading.Lock()
+
+    def is_blocked_domain(self, host: str) -> bool:
+        return any(
+            host == domain or host.endswith("." + domain) for domain in self.domains
+        )
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """
+        Check the request and count it if it's blocked
+        :param url:
+        :param resource_type: Playwright / CDP resource type (lower case)
+        :return: True if the request has to be aborted
+        """
+        host = host_of(url)
+        blocked = resource_type in self.resource_types or self.is_blocked_domain(host)
+        if not blocked:
+            return False
+
+        self.count_blocked(host, resource_type)
+        return True
+
+    def count_blocked(self, host: str, resource_type: str) -> None:
+        with self._lock:
+            self.blocked_types[resource_type] += 1
+            self.blocked_domains[host] += 1
+
+    def count_allowed(self, size: int | str | None) -> None:
+        """
+        Count the loaded response
+        :param size: bytes of the response (Content-Length or the encoded data length)
+        """
+        with self._lock:
+            self.allowed_requests += 1
+            try:
+                self.allowed_bytes += int(size or 0)
+            except ValueError:
+                pass
+
+    # Playwright
+
+    def _on_response(self, response) -> None:
+        self.count_allowed(response.headers.get("content-length"))
+
+    def _route(self, route) -> None:
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def _route_async(self, route) -> None:
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def attach(self, target) -> None:
+        """
+        Block the resources of the Playwright (sync API) page or context
+        """
+        target.route("**/*", self._route)
+        target.on("response", self._on_response)
+
+    async def attach_async(self, target) -> None:
+        """
+        Block the resources of the Playwright (async API) page or context
+        """
+        await target.route("**/*", self._route_async)
+        target.on("response", self._on_response)
+
+    # Selenium (Chrome DevTools Protocol)
+
+    def url_patterns(self) -> list[str]:
+        """
+        Network.setBlockedURLs patterns of the blocked resource types and domains
+        """
+        patterns = []
+        for resource_type in sorted(self.resource_types):
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, ()))
+        for domain in self.domains:
+            patterns.append(f"*://{domain}/*")
+            patterns.append(f"*.{domain}/*")
+
+        return patterns
+
+    def attach_selenium(self, driver) -> None:
+        """
+        Block the resources of the Chrome WebDriver, applies to the next page loads
+        """
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.url_patterns()})
+
+    def collect_selenium(self, driver) -> None:
+        """
+        Count the requests by the performance log of the driver
+        (it needs the capability goog:loggingPrefs = {"performance": "ALL"}).
+        The log is cleared on reading, so call it after every page.
+        """
+        urls = {}
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            params = message.get("params", {})
+
+            if message["method"] == "Network.requestWillBeSent":
+                urls[params["requestId"]] = params["request"]["url"]
+            elif message["method"] == "Network.loadingFinished":
+                self.count_allowed(params.get("encodedDataLength"))
+            elif message["method"] == "Network.loadingFailed" and params.get(
+                "blockedReason"
+            ):
+                self.count_blocked(
+                    host_of(urls.get(params["requestId"], "")),
+                    params.get("type", "other").lower(),
+                )
+
+    def report(self) -> str:
+        with self._lock:
+            blocked = sum(self.blocked_types.values())
+            types = ", ".join(f"{k}: {v}" for k, v in self.blocked_types.most_common())
+            domains = ", ".join(
+                f"{k}: {v}" for k, v in self.blocked_domains.most_common(10)
+            )
+
+            return (
+                f"🚫 Blocked {blocked} requests ({types}); top domains: {domains}. "
+                f"Loaded {self.allowed_requests} requests, {self.allowed_bytes / 1024:.0f} KiB"
+            )
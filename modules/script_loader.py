@@ -0,0 +1,20 @@
+"""
+Import of the numbered scripts (2_get_info.py, 4_get_info_playwright.py, ...)
+by the other scripts.
+
+The names of the scripts start with a digit, so they can't be imported
+by the import statement. A script is imported once, like any module:
+the next load_script() returns the same module with the same state.
+"""
+
+import importlib
+from types import ModuleType
+
+
+def load_script(name: str) -> ModuleType:
+    """
+    Import the script of the modules directory
+    :param name: file name without .py, e.g. "2_get_info"
+    :return:
+    """
+    return importlib.import_module(name)
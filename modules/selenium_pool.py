@@ -0,0 +1,160 @@
+"""
+Pool of the long-lived headless Chrome drivers (Selenium).
+
+Every worker thread owns one driver and takes the next job from the queue,
+so a job runs on whichever driver is free. A driver is quit and replaced
+after MAX_JOBS_PER_DRIVER jobs (the memory of Chrome grows with every page)
+or when it's broken. The chromedriver binary is resolved once per process.
+"""
+
+import os
+import queue
+import threading
+from functools import cache
+from typing import Any, Callable, Iterable
+
+from selenium import webdriver
+from selenium.common import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.webdriver import WebDriver
+from webdriver_manager.chrome import ChromeDriverManager
+
+from item_feed import feed
+from resource_blocking import BLOCKED_RESOURCE_TYPES, ResourceBlocker
+
+# Drivers (browsers) of the pool
+DRIVERS = 4
+
+# Jobs of one driver before it's restarted
+MAX_JOBS_PER_DRIVER = 200
+
+# Seconds to load a page
+PAGE_LOAD_TIMEOUT = 30
+
+# End of the items
+_END = object()
+
+
+@cache
+def driver_path() -> str:
+    """
+    Path of the chromedriver: CHROMEDRIVER_PATH or the one installed (and cached on disk)
+    by webdriver-manager, which is resolved only once per process
+    """
+    return os.environ.get("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+
+
+def new_driver(
+    headless: bool = True,
+    block: bool = True,
+    resource_types: tuple[str, ...] = BLOCKED_RESOURCE_TYPES,
+) -> WebDriver:
+    """
+    Start the Chrome driver
+    :param headless: run the browser without the window
+    :param block: block the heavy resources
+    :param resource_types: blocked resource types, see resource_blocking
+    :return:
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+
+    driver = webdriver.Chrome(options=options, service=Service(driver_path()))
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+
+    if block:
+        ResourceBlocker(resource_types).attach_selenium(driver)
+
+    return driver
+
+
+def _quit(driver: WebDriver) -> None:
+    try:
+        driver.quit()
+    except WebDriverException as e:
+        print(f"❌ Error quitting the driver: {e}")
+        # TO DO: logging
+
+
+def _driver_worker(
+    jobs: queue.Queue,
+    job: Callable[[WebDriver, Any], Any],
+    on_error: Callable[[Any, Exception], Any] | None,
+    max_jobs: int,
+    driver_options: dict,
+) -> None:
+    driver = None
+    done = 0
+
+    while (item := jobs.get()) is not _END:
+        try:
+            if driver is None:
+                driver = new_driver(**driver_options)
+                done = 0
+
+            job(driver, item)
+        except Exception as e:
+            print(f"❌ Error handling {item}: {e}")
+            # TO DO: logging
+
+            try:
+                if on_error:
+                    on_error(item, e)
+            except Exception as e:
+                print(f"❌ Error saving the failure of {item}: {e}")
+                # TO DO: logging
+
+            # The browser may be broken (crashed, hung), start a new one
+            if isinstance(e, WebDriverException) and driver is not None:
+                _quit(driver)
+                driver = None
+        finally:
+            done += 1
+            if driver is not None and done >= max_jobs:
+                _quit(driver)
+                driver = None
+
+    if driver is not None:
+        _quit(driver)
+
+
+def run(
+    items: Iterable[Any],
+    job: Callable[[WebDriver, Any], Any],
+    drivers: int = DRIVERS,
+    max_jobs_per_driver: int = MAX_JOBS_PER_DRIVER,
+    on_error: Callable[[Any, Exception], Any] | None = None,
+    **driver_options,
+) -> None:
+    """
+    Run the job for every item on a free driver of the pool
+    :param items: queue items, e.g. search queries
+    :param job: gets (driver, item)
+    :param drivers: drivers (worker threads)
+    :param max_jobs_per_driver: jobs of one driver before it's restarted
+    :param on_error: gets (item, error) of the failed job
+    :param driver_options: options of new_driver()
+    :return:
+    """
+    # The queue is bounded, so the items (e.g. a DB generator) are read on demand
+    jobs = queue.Queue(maxsize=drivers * 2)
+
+    workers = [
+        threading.Thread(
+            target=_driver_worker,
+            args=(jobs, job, on_error, max_jobs_per_driver, driver_options),
+        )
+        for _ in range(drivers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        feed(items, jobs, _END, len(workers))
+    finally:
+        for worker in workers:
+            worker.join()
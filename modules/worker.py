@@ -0,0 +1,164 @@
+"""
+Long-running scraping worker.
+
+Django is set up once (with the minimal settings profile by default),
+the HTTP connection pool or the browser are started once and kept warm,
+and the products are taken from the DB queue continuously: when the queue
+is empty the worker waits for the new ones instead of exiting.
+SIGTERM / Ctrl+C stop taking the new products, the claimed ones are finished
+and the buffers are saved.
+
+    python worker.py --engine http --concurrency 100
+    python worker.py --engine playwright --contexts 4 --pages 4
+"""
+
+import os
+
+# Minimal settings profile, set before load_django
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "braincomua_project.settings_scraper")
+
+import argparse
+import asyncio
+import signal
+import threading
+
+from load_django import *  # noqa
+import async_engine
+import http_cache
+import playwright_pool
+from brain_site import COOKIES, HEADERS
+from product_store import CLAIM_SIZE, IDLE_SLEEP, ProductStore, claim_forever
+from rate_limiter import HostRateLimiter
+from resource_blocking import ResourceBlocker
+from script_loader import load_script
+
+get_info = load_script("2_get_info")
+get_info_playwright = load_script("4_get_info_playwright")
+
+# Set by SIGTERM / SIGINT
+stop = threading.Event()
+
+
+def handle_stop(signum, frame) -> None:
+    print("🛑 Stopping, the claimed products are being finished...")
+    stop.set()
+
+
+def run_http(args: argparse.Namespace) -> None:
+    """
+    Fetch the products by the asyncio engine, one connection pool for the whole run
+    """
+    store = get_info.store
+    store.track_prices()
+
+    try:
+        asyncio.run(
+            async_engine.run(
+                claim_forever(args.claim_size, args.idle_sleep, stop),
+                get_url=lambda product: product.link,
+                handler=get_info.handle_product_page,
+                concurrency=args.concurrency,
+                get_headers=http_cache.conditional_headers,
+                on_error=get_info.save_failed_attempt,
+                headers=HEADERS,
+                cookies=COOKIES,
+                limiter=get_info.limiter,
+            )
+        )
+    finally:
+        # Save the rest of the buffers
+        store.close()
+        get_info.archive.close()
+
+
+def run_playwright(args: argparse.Namespace) -> None:
+    """
+    Scrape the products by the pool of browser contexts, one browser for the whole run
+    """
+    get_info_playwright.install_playwright_browsers()
+
+    store = ProductStore()
+    store.track_prices()
+    limiter = HostRateLimiter()
+    blocker = ResourceBlocker()
+
+    async def handler(page, parsed_data) -> None:
+        await get_info_playwright.scrape_product(page, parsed_data, store, limiter)
+
+    try:
+        asyncio.run(
+            playwright_pool.run(
+                claim_forever(args.claim_size, args.idle_sleep, stop),
+                handler,
+                contexts=args.contexts,
+                pages_per_context=args.pages,
+                on_context=blocker.attach_async,
+            )
+        )
+    finally:
+        # Save the rest of the buffers
+        store.close()
+        print(blocker.report())
+
+
+ENGINES = {
+    "http": run_http,
+    "playwright": run_playwright,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Long-running scraping worker")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="http",
+        help="'http' - asyncio engine, 'playwright' - pool of browser contexts",
+    )
+    parser.add_argument(
+        "--claim-size",
+        type=int,
+        default=CLAIM_SIZE,
+        help="Products reserved by one claim",
+    )
+    parser.add_argument(
+        "--idle-sleep",
+        type=float,
+        default=IDLE_SLEEP,
+        help="Seconds to wait for the new products when the queue is empty",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=async_engine.CONCURRENCY,
+        help="Max pages in flight (http)",
+    )
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=playwright_pool.CONTEXTS,
+        help="Browser contexts (playwright)",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=playwright_pool.PAGES_PER_CONTEXT,
+        help="Pages of one browser context (playwright)",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    print(f"🚀 Worker started, engine: {args.engine}")
+    ENGINES[args.engine](args)
+    print("✅ Worker stopped")
+
+
+if __name__ == "__main__":
+    main()